@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for generate-audio.py.
+
+Starts a local stand-in for the Hume TTS endpoint that returns synthetic MP3
+frames and word timestamps (with configurable latency and error rate), then
+runs generate-audio.py's main() against it for the extracted corpus and
+synthetic N-times-larger copies. Each corpus runs in its own process, in a
+temporary directory, so peak RSS is per run and public/audio is untouched.
+
+  python scripts/bench-audio.py                      # 1x and 10x corpora
+  python scripts/bench-audio.py --scales 1 --latency-ms 50 --error-rate 0.05
+  python scripts/bench-audio.py serve --port 8765    # just the mock server
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pipeline_metrics
+from script_loader import load_script
+
+SCRIPTS_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+EXTRACTED_DIR = SCRIPTS_DIR / "extracted"
+MANIFEST_PATH = SCRIPTS_DIR / "section-manifest.json"
+
+# MPEG-1 Layer III, 128 kbps, 48 kHz, mono: the format the real API returns.
+# 384-byte frames of 1152 samples (24 ms).
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x94, 0xC4])
+FRAME_BYTES = 384
+FRAME_MS = 24
+WORD_MS = 260  # Synthetic speaking rate
+GAP_MS = 60
+
+
+# --- Mock TTS server ------------------------------------------------------------
+
+def synthesize(utterances: list[dict]) -> dict:
+    """A TTS-shaped response: silent frames long enough for every word."""
+    snippets = []
+    t = 0
+    for utterance in utterances:
+        timestamps = []
+        for word in utterance["text"].split():
+            timestamps.append({"text": word, "time": {"begin": t, "end": t + WORD_MS}})
+            t += WORD_MS + GAP_MS
+        snippets.append([{"text": utterance["text"], "timestamps": timestamps}])
+    frame = FRAME_HEADER + bytes(FRAME_BYTES - len(FRAME_HEADER))
+    audio = frame * max(1, math.ceil(t / FRAME_MS))
+    return {
+        "generations": [{
+            "audio": base64.b64encode(audio).decode("ascii"),
+            "duration": t / 1000,
+            "snippets": snippets,
+        }]
+    }
+
+
+def serve(port: int, latency_ms: float, jitter_ms: float, error_rate: float) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+            if random.random() < error_rate:
+                status = random.choice((429, 500, 503))
+                self.send_response(status)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = json.dumps(synthesize(json.loads(body)["utterances"])).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+# --- One benchmark run ----------------------------------------------------------
+
+def write_corpus(root: Path, scale: int) -> int:
+    """Copy the extracted corpus `scale` times into root; returns the section count."""
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        sections = json.load(f)["sections"]
+    extracted = root / "extracted"
+    extracted.mkdir()
+    manifest = []
+    for copy in range(scale):
+        for section in sections:
+            sec_id = section["id"] if copy == 0 else f"{section['id']}-x{copy}"
+            with open(EXTRACTED_DIR / f"{section['id']}.json", encoding="utf-8") as f:
+                data = json.load(f)
+            data["sectionId"] = sec_id
+            with open(extracted / f"{sec_id}.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            manifest.append({**section, "id": sec_id})
+    with open(root / "section-manifest.json", "w", encoding="utf-8") as f:
+        json.dump({"sections": manifest}, f)
+    return len(manifest)
+
+
+def run_once(
+    url: str, scale: int, concurrency: int, rpm: float, backoff_base: float, batch: bool = False
+) -> dict:
+    os.environ["HUME_API_KEY"] = "offline-benchmark"
+    os.environ["HUME_API_URL"] = url
+    # The API URL and key are read when generate-audio.py is imported
+    ga = load_script("generate-audio.py")
+
+    with tempfile.TemporaryDirectory(prefix="bench-audio-") as tmp:
+        root = Path(tmp)
+        sections = write_corpus(root, scale)
+        ga.MANIFEST_PATH = root / "section-manifest.json"
+        ga.EXTRACTED_DIR = root / "extracted"
+        ga.AUDIO_OUTPUT_DIR = root / "audio"
+        ga.METADATA_OUTPUT_DIR = root / "metadata"
+        ga.WORK_DIR = root / "work"
+        ga.DEAD_LETTER_PATH = root / "failures.json"
+        ga.BACKOFF_BASE_S = backoff_base
+
+        argv = ["-c", str(concurrency), "--rpm", str(rpm), "--no-cache", "--metrics", str(root / "metrics.json")]
+        if batch:
+            argv.append("--batch-utterances")
+        start = time.perf_counter()
+        failed = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                asyncio.run(ga.main(argv))
+            except SystemExit as e:
+                failed = bool(e.code)
+        wall = time.perf_counter() - start
+
+        metrics = pipeline_metrics.report()
+        dead_letters = 0
+        if ga.DEAD_LETTER_PATH.exists():
+            with open(ga.DEAD_LETTER_PATH, encoding="utf-8") as f:
+                dead_letters = len(json.load(f))
+
+    stages = metrics["stages"]
+    counters = metrics["counters"]
+    request = stages.get("tts.request", {})
+    section = stages.get("section", {})
+    return {
+        "scale": scale,
+        "sections": sections,
+        "requests": request.get("count", 0),
+        "chars": counters.get("tts.request.chars", 0),
+        "audioBytes": counters.get("tts.request.bytes", 0),
+        "retries": counters.get("tts.retries", 0),
+        "deadLetters": dead_letters,
+        "failed": failed,
+        "wallS": round(wall, 3),
+        "charsPerSec": round(counters.get("tts.request.chars", 0) / wall, 1),
+        "requestsPerSec": round(request.get("count", 0) / wall, 2),
+        "requestP50Ms": request.get("p50Ms"),
+        "requestP99Ms": request.get("p99Ms"),
+        "sectionP50Ms": section.get("p50Ms"),
+        "sectionP99Ms": section.get("p99Ms"),
+        "schedulerWaitP99Ms": stages.get("scheduler.wait", {}).get("p99Ms"),
+        "alignP99Ms": stages.get("align", {}).get("p99Ms"),
+        "peakRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+# --- Driver ---------------------------------------------------------------------
+
+def print_table(results: list[dict]) -> None:
+    columns = [
+        ("scale", "scale", "{}x"),
+        ("sections", "sections", "{}"),
+        ("requests", "requests", "{}"),
+        ("wall s", "wallS", "{:.2f}"),
+        ("chars/s", "charsPerSec", "{:,.0f}"),
+        ("req/s", "requestsPerSec", "{:.1f}"),
+        ("req p50", "requestP50Ms", "{:.0f}ms"),
+        ("req p99", "requestP99Ms", "{:.0f}ms"),
+        ("sect p99", "sectionP99Ms", "{:.0f}ms"),
+        ("retries", "retries", "{}"),
+        ("failed", "deadLetters", "{}"),
+        ("peak RSS", "peakRssMb", "{:.0f}MB"),
+    ]
+    rows = [[fmt.format(r[key]) if r[key] is not None else "-" for _, key, fmt in columns] for r in results]
+    widths = [max(len(title), *(len(row[i]) for row in rows)) for i, (title, _, _) in enumerate(columns)]
+    print("  ".join(title.rjust(w) for (title, _, _), w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(cell.rjust(w) for cell, w in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", nargs="?", choices=("bench", "serve", "run"), default="bench",
+                        help="bench (default), serve: only the mock server, run: one corpus (internal)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="corpus sizes (default: 1 10)")
+    parser.add_argument("--port", type=int, default=0, help="mock server port (default: any free port)")
+    parser.add_argument("--url", help="TTS endpoint for `run` (default: start the mock server)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="mock response latency (default: 200)")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="extra uniform random latency (default: 100)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 429/500/503 responses (default: 0)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="generate-audio --concurrency (default: 8)")
+    parser.add_argument("--rpm", type=float, default=60_000, help="generate-audio --rpm (default: 60000)")
+    parser.add_argument("--backoff-base", type=float, default=0.05,
+                        help="retry backoff base in seconds, instead of the production value (default: 0.05)")
+    parser.add_argument("--batch-utterances", action="store_true",
+                        help="run generate-audio with --batch-utterances")
+    parser.add_argument("--json", type=Path, metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        port = args.port or 8765
+        print(f"Mock TTS server on http://127.0.0.1:{port}/")
+        serve(port, args.latency_ms, args.jitter_ms, args.error_rate)
+        return
+    if args.command == "run":
+        result = run_once(
+            args.url, args.scales[0], args.concurrency, args.rpm, args.backoff_base, args.batch_utterances
+        )
+        print(json.dumps(result))
+        return
+
+    port = args.port or free_port()
+    server = subprocess.Popen([
+        sys.executable, __file__, "serve", "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+    ], stdout=subprocess.DEVNULL)
+    results = []
+    try:
+        wait_for_port(port)
+        print(f"Mock TTS: {args.latency_ms:g}ms + 0-{args.jitter_ms:g}ms latency, "
+              f"{args.error_rate:.0%} errors; concurrency {args.concurrency}\n")
+        for scale in args.scales:
+            out = subprocess.run([
+                sys.executable, __file__, "run", "--url", f"http://127.0.0.1:{port}/",
+                "--scales", str(scale), "-c", str(args.concurrency), "--rpm", str(args.rpm),
+                "--backoff-base", str(args.backoff_base),
+                *(["--batch-utterances"] if args.batch_utterances else []),
+            ], capture_output=True, text=True, check=True)
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if any(r["failed"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
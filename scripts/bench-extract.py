@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for extract-text.py over the src/components/acts tree.
+- TermDefinition-inside-<p> containment in the regex reference path: linear
+  scan vs IntervalIndex (the default scanner engine checks it inline)
+- clean_text: current implementation vs the original re.sub/str.replace chain
+- scaling: every extract_* function on synthetic sections of growing size and
+  tag density, and on adversarial unclosed/unterminated tags, with MB/s and
+  the fitted growth exponent (1 = linear)
+"""
+
+import argparse
+import glob
+import math
+import os
+import random
+import re
+import sys
+import time
+
+from script_loader import load_script
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACTS_DIR = os.path.join(PROJECT_ROOT, "src", "components", "acts")
+
+
+def best_of(fn, repeat: int, budget: float = float("inf")) -> float:
+    """Return the fastest of `repeat` runs of fn(), in seconds. Stops early
+    (after at least one run) once the runs have taken `budget` seconds."""
+    best = float("inf")
+    spent = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent >= budget:
+            break
+    return best
+
+
+def reference_clean_text(text: str) -> str:
+    """The original clean_text/strip_jsx_tags, kept verbatim as a baseline."""
+    text = re.sub(r"\{/\*.*?\*/\}", "", text, flags=re.DOTALL)
+    text = re.sub(r'\{"([^"]*)"\}', r"\1", text)
+    text = re.sub(r"\{'([^']*)'\}", r"\1", text)
+    text = re.sub(r"\{[^}]*\}", "", text)
+    text = text.replace("&apos;", "'")
+    text = text.replace("&quot;", '"')
+    text = text.replace("&amp;", "&")
+    text = text.replace("&lt;", "<")
+    text = text.replace("&gt;", ">")
+    text = text.replace("&mdash;", " — ")
+    text = text.replace("&ndash;", " – ")
+    text = text.replace("&hellip;", "...")
+    text = text.replace("&rarr;", "→")
+    text = text.replace("&larr;", "←")
+    text = text.replace("&times;", "×")
+    text = text.replace("&nbsp;", " ")
+    text = re.sub(r"&#(\d+);", lambda m: chr(int(m.group(1))), text)
+    text = re.sub(r"&#x([0-9a-fA-F]+);", lambda m: chr(int(m.group(1), 16)), text)
+    text = re.sub(r"<br\s*/?>", " ", text)
+    text = re.sub(r"<[A-Z]\w+[^>]*/\s*>", "", text)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def bench_clean_text(et, sources: dict[str, str], repeat: int) -> None:
+    # Record every string the extractor passes to clean_text
+    inputs = []
+    original = et.clean_text
+
+    def recording(text):
+        inputs.append(text)
+        return original(text)
+
+    et.clean_text = recording
+    try:
+        for name, content in sources.items():
+            if not name.startswith("("):
+                et.extract_blocks_scan(content)
+    finally:
+        et.clean_text = original
+
+    for text in inputs:
+        assert original(text) == reference_clean_text(text), text[:80]
+
+    t_reference = best_of(lambda: [reference_clean_text(t) for t in inputs], repeat)
+    t_current = best_of(lambda: [original(t) for t in inputs], repeat)
+    chars = sum(len(t) for t in inputs)
+    print("clean_text")
+    print(f"  {len(inputs)} calls, {chars:,} chars, outputs identical")
+    print(f"  reference: {t_reference*1e3:8.2f} ms")
+    print(f"  current:   {t_current*1e3:8.2f} ms  ({t_reference/t_current:.1f}x)")
+
+
+def bench_containment(et, sources: dict[str, str], repeat: int) -> None:
+    print("TermDefinition-in-<p> containment (regex reference path only)")
+    print(f"  {'source':<40} {'terms':>6} {'<p>':>6} {'linear':>10} {'index':>10} {'speedup':>8}")
+
+    for name, content in sources.items():
+        p_ranges = [
+            (m.start(), m.end()) for m in re.finditer(r"<p\b[^>]*>.*?</p>", content, re.DOTALL)
+        ]
+        terms = [m.start() for m in re.finditer(r"<TermDefinition\b", content)]
+        if not terms or not p_ranges:
+            continue
+
+        def linear():
+            return [any(start <= pos < end for start, end in p_ranges) for pos in terms]
+
+        def indexed():
+            index = et.IntervalIndex(p_ranges)
+            return [index.contains(pos) for pos in terms]
+
+        assert linear() == indexed(), name
+        t_linear = best_of(linear, repeat)
+        t_indexed = best_of(indexed, repeat)
+        print(
+            f"  {name:<40} {len(terms):>6} {len(p_ranges):>6} "
+            f"{t_linear*1e6:>8.1f}us {t_indexed*1e6:>8.1f}us {t_linear/t_indexed:>7.1f}x"
+        )
+
+
+# --- Scaling --------------------------------------------------------------------
+
+SCALING_FUNCTIONS = (
+    "extract_h3_blocks",
+    "extract_paragraph_blocks",
+    "extract_analogy_cards",
+    "extract_term_definitions",
+    "extract_info_cards",
+    "extract_reveal_cards",
+    "extract_blocks_regex",
+    "extract_blocks_scan",
+)
+WORDS = (
+    "the drive controller queue flash page block host command data write read "
+    "namespace latency memory firmware bus signal cell voltage wear error"
+).split()
+# Growth exponent above which a function is flagged as super-linear
+SUPERLINEAR = 1.3
+# Stop repeating a scaling measurement once it has taken this long
+SCALING_BUDGET_S = 0.5
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def narrated_element(rng: random.Random) -> str:
+    """One block-producing element, shaped like the act components."""
+    kind = rng.choices(("h3", "p", "analogy", "term", "info", "reveal", "mcq"), (2, 10, 1, 1, 1, 1, 1))[0]
+    if kind == "h3":
+        return f'<h3 className="text-2xl font-bold text-text-primary mb-6">{sentence(rng, 4)}</h3>'
+    if kind == "p":
+        inner = " ".join(
+            f'<strong className="text-text-primary">{rng.choice(WORDS)}</strong>'
+            if rng.random() < 0.1 else sentence(rng, rng.randint(6, 14))
+            for _ in range(rng.randint(2, 6))
+        )
+        if rng.random() < 0.2:
+            inner += f' <TermDefinition term="{rng.choice(WORDS)}" definition="{sentence(rng, 8)}" />'
+        return (f'<p className="text-text-secondary leading-relaxed mb-4">\n'
+                f'  {inner} that&apos;s {{" "}}{sentence(rng, 5)}\n</p>')
+    if kind == "analogy":
+        return f'<AnalogyCard\n  concept="{sentence(rng, 3)}"\n  analogy="{sentence(rng, 20)}"\n/>'
+    if kind == "term":
+        return f'<TermDefinition term="{rng.choice(WORDS)}" definition="{sentence(rng, 12)}" />'
+    if kind == "info":
+        return (f'<InfoCard title="{sentence(rng, 3)}" variant="note">\n'
+                f'  {sentence(rng, 25)}\n</InfoCard>')
+    if kind == "reveal":
+        return f'<RevealCard\n  id="kc"\n  prompt="{sentence(rng, 15)}"\n  answer="{sentence(rng, 30)}"\n/>'
+    options = ", ".join(f'"{sentence(rng, 6)}"' for _ in range(4))
+    return (f'<RevealCard\n  prompt="{sentence(rng, 15)}"\n  options={{[{options}]}}\n'
+            f'  correctIndex={{1}}\n>\n</RevealCard>')
+
+
+def filler_element(rng: random.Random) -> str:
+    """Layout markup that produces no blocks."""
+    return rng.choice((
+        '<div className="grid grid-cols-2 gap-4 my-6">',
+        "</div>",
+        '<svg viewBox="0 0 100 40"><rect x="2" y="2" width="40" height="20" rx="4" /></svg>',
+        "{/* Diagram: host and controller queues */}",
+        '<span className="font-mono text-xs">{value.toString(16)}</span>',
+        '<p className="text-xs text-gray-500">0x1F</p>',
+    ))
+
+
+def synthetic_tsx(blocks: int, density: float, seed: int = 0) -> str:
+    """A section with `blocks` narrated elements; `density` is the share of
+    elements that are narrated (the rest is layout markup)."""
+    rng = random.Random(seed)
+    parts = ["export default function Synthetic() {", "  return (", "    <SectionWrapper>"]
+    narrated = 0
+    while narrated < blocks:
+        if rng.random() < density:
+            parts.append(narrated_element(rng))
+            narrated += 1
+        else:
+            parts.append(filler_element(rng))
+    parts += ["    </SectionWrapper>", "  );", "}", ""]
+    return "\n".join(parts)
+
+
+# Malformed input: each repeats an opening construct that is never closed,
+# so a lazy (.*?) or [^>]* scan from every occurrence can run to the end of
+# the file (quadratic in the number of occurrences if nothing stops it)
+ADVERSARIAL = {
+    "unclosed <p>": '<p className="leading-relaxed">Text that never closes',
+    "unclosed <h3>": "<h3>Heading without an end",
+    "unclosed <InfoCard>": '<InfoCard title="Note">Body without a closing tag',
+    "unclosed <RevealCard>": '<RevealCard prompt="Question?" options={["a", "b"]}>',
+    "unterminated <AnalogyCard": '<AnalogyCard concept="Cell" analogy="A bucket of charge"',
+    "unterminated <TermDefinition": '<TermDefinition term="LBA" definition="Logical block address"',
+    "unclosed {/* comment": '<p className="leading-relaxed">{/* never closed </p>',
+}
+
+
+def adversarial_tsx(unit: str, count: int) -> str:
+    return "\n".join(unit for _ in range(count))
+
+
+def growth_exponent(sizes: list[int], times: list[float]) -> float:
+    """Least-squares slope of log(time) against log(size)."""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+def scaling_table(et, title: str, corpora: list[tuple[int, str]], repeat: int) -> dict[str, float]:
+    """Time every SCALING_FUNCTIONS entry on each corpus; print one row per
+    function and return its growth exponent."""
+    sizes = [len(content) for _, content in corpora]
+    print(title)
+    header = "".join(f"{n:>10,}" for n, _ in corpora)
+    print(f"  {'function':<26}{header}  {'MB/s':>8}  {'exp':>5}")
+    print(f"  {'':<26}{''.join(f'{size / 1024:>8.0f}KB' for size in sizes)}")
+
+    exponents = {}
+    for name in SCALING_FUNCTIONS:
+        fn = getattr(et, name)
+        times = [best_of(lambda c=content: fn(c), repeat, SCALING_BUDGET_S) for _, content in corpora]
+        exponent = growth_exponent(sizes, times)
+        exponents[name] = exponent
+        throughput = sizes[-1] / times[-1] / 1e6 if times[-1] else float("inf")
+        flag = "  super-linear" if exponent > SUPERLINEAR else ""
+        cells = "".join(f"{t * 1e3:>8.2f}ms" for t in times)
+        print(f"  {name:<26}{cells}  {throughput:>8.1f}  {exponent:>5.2f}{flag}")
+    print()
+    return exponents
+
+
+def bench_scaling(et, args) -> dict[str, float]:
+    """Run the synthetic and adversarial scaling tables. Returns the growth
+    exponent of every function on every corpus, keyed "<corpus> <function>"."""
+    exponents = {}
+    repeat = max(1, args.repeat // 5)
+
+    for density in args.densities:
+        corpora = [(n, synthetic_tsx(n, density, seed=n)) for n in args.sizes]
+        for n, content in corpora:
+            if et.extract_blocks_scan(content) != et.extract_blocks_regex(content):
+                print(f"  WARNING: scan and regex engines disagree on the {n}-block synthetic section")
+        table = scaling_table(
+            et, f"Synthetic sections, {density:.0%} narrated elements (columns: blocks)", corpora, repeat
+        )
+        for name, exponent in table.items():
+            exponents[f"synthetic {density:.0%} {name}"] = exponent
+
+    for label, unit in ADVERSARIAL.items():
+        corpora = [(n, adversarial_tsx(unit, n)) for n in args.adversarial_sizes]
+        table = scaling_table(et, f"Adversarial: {label} (columns: repeats)", corpora, repeat)
+        for name, exponent in table.items():
+            exponents[f"{label} {name}"] = exponent
+    return exponents
+
+
+BENCHMARKS = ("containment", "clean_text", "scaling")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "benchmarks", nargs="*",
+        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=50,
+                        help="runs per measurement, best is kept (scaling uses a fifth)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 900, 2700],
+                        help="narrated blocks per synthetic section (default: 100 300 900 2700)")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.9, 0.3],
+                        help="share of narrated elements in synthetic sections (default: 0.9 0.3)")
+    parser.add_argument("--adversarial-sizes", type=int, nargs="+", default=[200, 400, 800, 1600],
+                        help="repeats of each malformed construct (default: 200 400 800 1600)")
+    parser.add_argument("--max-exponent", type=float, metavar="EXP",
+                        help="exit non-zero if extract_blocks_scan's exponent exceeds EXP on any corpus (e.g. 1.3)")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)} (choose from {', '.join(BENCHMARKS)})")
+    benchmarks = args.benchmarks or BENCHMARKS
+
+    et = load_script("extract-text.py")
+
+    sources = {}
+    for path in sorted(glob.glob(os.path.join(ACTS_DIR, "**", "*.tsx"), recursive=True)):
+        with open(path, "r", encoding="utf-8") as f:
+            sources[os.path.relpath(path, ACTS_DIR)] = f.read()
+    # The whole tree as one file stands in for a much larger, glossary-heavy section
+    sources["(all acts concatenated)"] = "\n".join(sources.values())
+
+    if "containment" in benchmarks:
+        bench_containment(et, sources, args.repeat)
+        print()
+    if "clean_text" in benchmarks:
+        bench_clean_text(et, sources, args.repeat)
+        print()
+    if "scaling" in benchmarks:
+        exponents = bench_scaling(et, args)
+        if args.max_exponent is not None:
+            # Only the engine the build uses is gated: the regex reference
+            # extractors are known to be quadratic on unclosed tags
+            over = {
+                k: v for k, v in exponents.items()
+                if k.endswith(" extract_blocks_scan") and v > args.max_exponent
+            }
+            for label, exponent in sorted(over.items(), key=lambda kv: -kv[1]):
+                print(f"OVER {args.max_exponent:g}: {label} ({exponent:.2f})")
+            if over:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
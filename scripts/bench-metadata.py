@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Size and parse-time comparison of the plain and compact section metadata
+formats over public/audio/metadata. Every file is round-tripped through the
+compact encoding first; files already in the compact format are checked and
+decoded. Exits non-zero if any file does not survive the round trip.
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import sys
+import time
+
+import metadata_codec
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METADATA_DIR = os.path.join(PROJECT_ROOT, "public", "audio", "metadata")
+
+
+def best_of(fn, repeat: int) -> float:
+    """Return the fastest of `repeat` runs of fn(), in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="metadata files (default: every section in public/audio/metadata)")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(METADATA_DIR, "sec-*.json")))
+    plain_texts = []
+    compact_texts = []
+    failures = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+        if metadata_codec.is_compact(doc):
+            problems = metadata_codec.check(doc)
+            for problem in problems:
+                print(f"  {os.path.basename(path)}: {problem}")
+            failures += bool(problems)
+        meta = metadata_codec.decode(doc)
+        compact = metadata_codec.dumps(meta, compact=True)
+        if metadata_codec.decode(json.loads(compact)) != meta:
+            print(f"  {os.path.basename(path)}: compact round trip differs")
+            failures += 1
+        plain_texts.append(metadata_codec.dumps(meta))
+        compact_texts.append(compact)
+
+    words = sum(
+        len(block["timestamps"])
+        for text in plain_texts
+        for block in json.loads(text)["blocks"]
+    )
+    print(f"{len(paths)} files, {words:,} word timestamps, {failures} failed verification\n")
+
+    def sizes(texts: list[str]) -> tuple[int, int]:
+        raw = [t.encode("utf-8") for t in texts]
+        return sum(map(len, raw)), sum(len(gzip.compress(b, 9)) for b in raw)
+
+    plain_size, plain_gz = sizes(plain_texts)
+    compact_size, compact_gz = sizes(compact_texts)
+    print(f"{'':<10} {'bytes':>12} {'gzip -9':>12}")
+    print(f"{'plain':<10} {plain_size:>12,} {plain_gz:>12,}")
+    print(f"{'compact':<10} {compact_size:>12,} {compact_gz:>12,}")
+    print(f"{'ratio':<10} {plain_size/compact_size:>11.1f}x {plain_gz/compact_gz:>11.1f}x\n")
+
+    t_plain = best_of(lambda: [json.loads(t) for t in plain_texts], args.repeat)
+    t_compact = best_of(lambda: [json.loads(t) for t in compact_texts], args.repeat)
+    t_decode = best_of(
+        lambda: [metadata_codec.decode(json.loads(t)) for t in compact_texts], args.repeat
+    )
+    print("parse (all files)")
+    print(f"  plain json.loads:           {t_plain*1e3:8.2f} ms")
+    print(f"  compact json.loads:         {t_compact*1e3:8.2f} ms  ({t_plain/t_compact:.1f}x)")
+    print(f"  compact json.loads+decode:  {t_decode*1e3:8.2f} ms  ({t_plain/t_decode:.1f}x)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
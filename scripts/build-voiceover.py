@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Incremental voiceover build: TSX → extracted JSON → section audio → manifest.
+Each step is a node in a dependency graph. A node reruns only when the
+content hash of its inputs changed (or its outputs are missing), and
+independent nodes run in parallel. On the first build, outputs that already
+match their inputs (e.g. committed audio) are adopted instead of rebuilt.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pipeline_metrics
+from script_loader import load_script
+
+SCRIPTS_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+STATE_PATH = SCRIPTS_DIR / ".build-state.json"
+
+# Bump to force every node of that kind to rebuild once
+EXTRACT_RECIPE = 1
+AUDIO_RECIPE = 1
+MANIFEST_RECIPE = 1
+
+
+def extract_worker(job: tuple[str, str, str]) -> dict:
+    """Process-pool entry point; loads the extractor inside the worker."""
+    return load_script("extract-text.py").extract_job(job)
+
+
+def extract_worker_measured(job: tuple[str, str, str]) -> tuple[dict, dict]:
+    return load_script("extract-text.py").extract_job_measured(job)
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                h.update(block)
+    except FileNotFoundError:
+        return "missing"
+    return h.hexdigest()
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Node:
+    name: str
+    deps: list[str]
+    outputs: list[Path]
+    # Called once all deps are done; returns the content hash of the inputs
+    inputs: callable
+    # async () -> list[Path]: build the node and return the outputs it wrote
+    build: callable
+    # async () -> bool: with no recorded state, whether the existing outputs
+    # already match the inputs (e.g. written by generate-audio.py directly)
+    adopt: callable = None
+    status: str = "pending"
+    error: str = ""
+    produced: list[Path] = field(default_factory=list)
+
+
+class BuildState:
+    """Fingerprints and outputs of every node from the last successful build."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.nodes: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.nodes = {}
+
+    def up_to_date(self, name: str, digest: str) -> bool:
+        entry = self.nodes.get(name)
+        if not entry or entry["fingerprint"] != digest:
+            return False
+        return all((PROJECT_ROOT / p).exists() for p in entry["outputs"])
+
+    def record(self, name: str, digest: str, outputs: list[Path]) -> None:
+        self.nodes[name] = {
+            "fingerprint": digest,
+            "outputs": [str(p.relative_to(PROJECT_ROOT)) for p in outputs],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.nodes, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+async def run_graph(nodes: dict[str, Node], state: BuildState, force: bool, dry_run: bool) -> None:
+    """Run every node as soon as its dependencies are done. Nodes whose
+    dependency failed are marked blocked; everything else keeps going."""
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(node: Node) -> None:
+        await asyncio.gather(*(tasks[d] for d in node.deps))
+        if any(nodes[d].status in ("failed", "blocked") for d in node.deps):
+            node.status = "blocked"
+            return
+        if dry_run and any(nodes[d].status == "would build" for d in node.deps):
+            # Inputs are not final yet; assume they change
+            node.status = "would build"
+            print(f"  would build {node.name} (after upstream)")
+            return
+
+        digest = node.inputs()
+        if not force and state.up_to_date(node.name, digest):
+            node.status = "up to date"
+            return
+        if not force and node.name not in state.nodes and node.adopt is not None and await node.adopt():
+            # First build over outputs made without this tool: record them
+            # as built rather than paying to regenerate identical audio
+            if not dry_run:
+                state.record(node.name, digest, node.outputs)
+            node.status = "adopted"
+            return
+        if dry_run:
+            node.status = "would build"
+            print(f"  would build {node.name}")
+            return
+        try:
+            with pipeline_metrics.timer(f"node.{node.name.partition(':')[0]}"):
+                node.produced = await node.build()
+        except Exception as e:
+            node.status = "failed"
+            node.error = str(e)
+            print(f"FAILED {node.name}: {e}")
+            return
+        state.record(node.name, digest, node.produced)
+        node.status = "built"
+
+    # Dict order is a topological order: nodes are added after their deps
+    for name, node in nodes.items():
+        tasks[name] = asyncio.create_task(run(node))
+    await asyncio.gather(*tasks.values())
+
+
+def plan(
+    et,
+    ga,
+    manifest: dict,
+    sections: list[dict],
+    pool: ProcessPoolExecutor,
+    synth: dict,
+) -> dict[str, Node]:
+    """Build the dependency graph for `sections`."""
+    nodes: dict[str, Node] = {}
+    loop = asyncio.get_running_loop()
+
+    for section in sections:
+        sec_id = section["id"]
+        source = PROJECT_ROOT / section["file"]
+        extracted = Path(et.OUTPUT_DIR) / f"{sec_id}.json"
+        audio = ga.AUDIO_OUTPUT_DIR / f"{sec_id}.mp3"
+        metadata = ga.METADATA_OUTPUT_DIR / f"{sec_id}.json"
+
+        async def extract(sec_id=sec_id, source=source) -> dict:
+            content = source.read_text(encoding="utf-8")
+            job = (sec_id, content, "scan")
+            if pipeline_metrics.enabled():
+                result, measured = await loop.run_in_executor(pool, extract_worker_measured, job)
+                pipeline_metrics.merge(measured)
+                return result
+            return await loop.run_in_executor(pool, extract_worker, job)
+
+        async def build_extract(sec_id=sec_id, extract=extract, extracted=extracted):
+            result = await extract()
+            if et.write_if_changed(str(extracted), json.dumps(result, indent=2, ensure_ascii=False)):
+                print(f"  extracted {sec_id}: {len(result['blocks'])} blocks")
+            return [extracted]
+
+        async def adopt_extract(extract=extract, extracted=extracted):
+            if not extracted.exists():
+                return False
+            result = await extract()
+            return extracted.read_text(encoding="utf-8") == json.dumps(result, indent=2, ensure_ascii=False)
+
+        nodes[f"extract:{sec_id}"] = Node(
+            name=f"extract:{sec_id}",
+            deps=[],
+            outputs=[extracted],
+            inputs=lambda source=source, file=section["file"]: fingerprint(
+                EXTRACT_RECIPE, et.EXTRACTOR_VERSION, file, file_digest(source)
+            ),
+            build=build_extract,
+            adopt=adopt_extract,
+        )
+
+        async def build_audio(sec_id=sec_id, label=section["label"], extracted=extracted,
+                              audio=audio, metadata=metadata):
+            with open(extracted, encoding="utf-8") as f:
+                blocks = json.load(f).get("blocks", [])
+            if not ga.HUME_API_KEY:
+                raise RuntimeError("HUME_API_KEY is not set")
+            result = await ga.process_section(
+                await synth["client"](), sec_id, blocks, label,
+                synth["scheduler"], synth["cache"], synth["compact"], synth["batch"],
+            )
+            return [audio, metadata] if result else []
+
+        async def adopt_audio(sec_id=sec_id, extracted=extracted):
+            # generate-audio.py keeps existing sections; so does the first
+            # build, as long as they narrate the current extracted blocks
+            meta = ga.load_finished_section(sec_id)
+            if meta is None or not extracted.exists():
+                return False
+            with open(extracted, encoding="utf-8") as f:
+                blocks = ga.narration_blocks(json.load(f).get("blocks", []))
+            narrated = meta["blocks"]
+            return [(b["blockIndex"], b["text"]) for b in blocks] == [(b["blockIndex"], b["text"]) for b in narrated]
+
+        # Section audio depends only on the extracted text (plus voice settings),
+        # so a TSX edit that does not change the narration stops here
+        nodes[f"audio:{sec_id}"] = Node(
+            name=f"audio:{sec_id}",
+            deps=[f"extract:{sec_id}"],
+            outputs=[audio, metadata],
+            inputs=lambda extracted=extracted: fingerprint(
+                AUDIO_RECIPE, ga.HUME_VOICE_ID, ga.TTS_VERSION, ga.AUDIO_FORMAT,
+                synth["compact"], synth["batch"], file_digest(extracted),
+            ),
+            build=build_audio,
+            adopt=adopt_audio,
+        )
+
+    labels = {s["id"]: s["label"] for s in manifest["sections"]}
+    metadata_paths = [ga.METADATA_OUTPUT_DIR / f"{s['id']}.json" for s in manifest["sections"]]
+
+    def manifest_entries() -> list[dict]:
+        entries = []
+        for path in metadata_paths:
+            if path.exists():
+                meta = ga.metadata_codec.load(path)
+                entries.append(ga.manifest_entry(meta, labels[meta["sectionId"]]))
+        return entries
+
+    async def build_manifest():
+        return [ga.write_master_manifest(manifest_entries())]
+
+    async def adopt_manifest():
+        manifest_path = ga.METADATA_OUTPUT_DIR / "manifest.json"
+        if not manifest_path.exists():
+            return False
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f).get("sections") == manifest_entries()
+
+    nodes["manifest"] = Node(
+        name="manifest",
+        deps=[name for name in nodes if name.startswith("audio:")],
+        outputs=[ga.METADATA_OUTPUT_DIR / "manifest.json"],
+        inputs=lambda: fingerprint(
+            MANIFEST_RECIPE, labels, [file_digest(p) for p in metadata_paths]
+        ),
+        build=build_manifest,
+        adopt=adopt_manifest,
+    )
+    return nodes
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sections", nargs="*", help="only build these section ids (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="extraction worker processes (default: CPU count)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4,
+                        help="max in-flight TTS requests (default: 4)")
+    parser.add_argument("--rpm", type=float, default=None, help="TTS request quota per minute")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the TTS chunk cache")
+    parser.add_argument("--compact-metadata", action="store_true",
+                        help="write section metadata in the compact columnar format")
+    parser.add_argument("--batch-utterances", action="store_true",
+                        help="send each block as its own utterance (see generate-audio.py)")
+    parser.add_argument("-f", "--force", action="store_true", help="rebuild every selected node")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="list nodes that would rebuild")
+    parser.add_argument("--metrics", type=Path, metavar="PATH", help="write stage timings as JSON to PATH")
+    parser.add_argument("--profile", type=Path, metavar="PATH", help="run under cProfile, stats to PATH")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.rpm is not None and args.rpm <= 0:
+        parser.error("--rpm must be positive")
+
+    et = load_script("extract-text.py")
+    ga = load_script("generate-audio.py")
+
+    with open(et.MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    sections = manifest["sections"]
+    if args.sections:
+        unknown = set(args.sections) - {s["id"] for s in sections}
+        if unknown:
+            parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+        sections = [s for s in sections if s["id"] in args.sections]
+
+    if not args.dry_run:
+        os.makedirs(et.OUTPUT_DIR, exist_ok=True)
+        ga.AUDIO_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        ga.METADATA_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    state = BuildState(STATE_PATH)
+    scheduler_args = [args.concurrency] + ([args.rpm] if args.rpm else [])
+    synth = {
+        "scheduler": ga.RequestScheduler(*scheduler_args),
+        # ChunkCache creates its directory, and a dry run writes nothing
+        "cache": None if args.no_cache or args.dry_run else ga.ChunkCache(ga.CACHE_DIR, ga.DEFAULT_CACHE_MAX_MB * 1024 * 1024),
+        "compact": args.compact_metadata,
+        "batch": args.batch_utterances,
+        "http": None,
+    }
+
+    async def client():
+        # Opened on first use, so builds without synthesis need no network
+        if synth["http"] is None:
+            import httpx
+            synth["http"] = httpx.AsyncClient(limits=httpx.Limits(max_connections=args.concurrency))
+        return synth["http"]
+
+    synth["client"] = client
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        nodes = plan(et, ga, manifest, sections, pool, synth)
+        if args.metrics:
+            pipeline_metrics.enable()
+        try:
+            with pipeline_metrics.profiled(args.profile):
+                await run_graph(nodes, state, args.force, args.dry_run)
+        finally:
+            if synth["http"] is not None:
+                await synth["http"].aclose()
+
+    counts: dict[str, int] = {}
+    for node in nodes.values():
+        counts[node.status] = counts.get(node.status, 0) + 1
+    print("\n" + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+    if args.metrics:
+        pipeline_metrics.write_report(args.metrics)
+
+    if synth["scheduler"].dead_letters:
+        with open(ga.DEAD_LETTER_PATH, "w", encoding="utf-8") as f:
+            json.dump(synth["scheduler"].dead_letters, f, indent=2, ensure_ascii=False)
+        print(f"Failed chunks listed in {ga.DEAD_LETTER_PATH}")
+    return 1 if counts.get("failed") or counts.get("blocked") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -4,58 +4,218 @@ Extract narrative text from JSX/TSX story components for voiceover generation.
 Reads each section's .tsx file and outputs ordered text blocks as JSON.
 """
 
+import argparse
+import bisect
+import contextlib
+import difflib
+import hashlib
 import json
 import os
 import re
 import sys
-import html
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TextIO
+
+import pipeline_metrics
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MANIFEST_PATH = os.path.join(PROJECT_ROOT, "scripts", "section-manifest.json")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "scripts", "extracted")
+INDEX_PATH = os.path.join(PROJECT_ROOT, "scripts", ".extract-index.json")
+
+# Bump whenever a change to this file can alter the extracted output, so
+# incremental runs re-extract everything once.
+EXTRACTOR_VERSION = 1
+
+
+BR_TAG_RE = re.compile(r"<br\s*/?>")
+SELF_CLOSING_COMPONENT_RE = re.compile(r"<[A-Z]\w+[^>]*/\s*>")
+ANY_TAG_RE = re.compile(r"<[^>]+>")
+JSX_COMMENT_RE = re.compile(r"\{/\*.*?\*/\}", re.DOTALL)
+JSX_DQ_STRING_RE = re.compile(r'\{"([^"]*)"\}')
+JSX_SQ_STRING_RE = re.compile(r"\{'([^']*)'\}")
+JSX_EXPRESSION_RE = re.compile(r"\{[^}]*\}")
+DEC_ENTITY_RE = re.compile(r"&#(\d+);")
+HEX_ENTITY_RE = re.compile(r"&#x([0-9a-fA-F]+);")
+
+NAMED_ENTITIES = {
+    "apos": "'",
+    "quot": '"',
+    "amp": "&",
+    "lt": "<",
+    "gt": ">",
+    "mdash": " — ",
+    "ndash": " – ",
+    "hellip": "...",
+    "rarr": "→",
+    "larr": "←",
+    "times": "×",
+    "nbsp": " ",
+}
+# One pass over the named entities above. Only this fixed set is decoded
+# (html.unescape would also turn &ldquo; etc. into characters, changing the
+# narration text). The optional "amp;" prefix reproduces the old chain of
+# str.replace calls, where "&amp;" was decoded before "&lt;" through "&nbsp;",
+# so "&amp;lt;" ended up as "<" but "&amp;quot;" as "&quot;".
+NAMED_ENTITY_RE = re.compile(
+    r"&(?:amp;)?(lt|gt|mdash|ndash|hellip|rarr|larr|times|nbsp);|&(apos|quot|amp);"
+)
+
+
+def _named_entity(match: re.Match) -> str:
+    return NAMED_ENTITIES[match.group(1) or match.group(2)]
 
 
 def strip_jsx_tags(text: str) -> str:
     """Remove JSX/HTML tags and clean up whitespace, preserving inner text."""
+    if "<" not in text:
+        return text
     # Replace <br/> or <br /> with space
-    text = re.sub(r"<br\s*/?>", " ", text)
+    if "<br" in text:
+        text = BR_TAG_RE.sub(" ", text)
     # Remove self-closing tags like <Component />
-    text = re.sub(r"<[A-Z]\w+[^>]*/\s*>", "", text)
+    text = SELF_CLOSING_COMPONENT_RE.sub("", text)
     # Remove all remaining HTML/JSX tags
-    text = re.sub(r"<[^>]+>", "", text)
+    text = ANY_TAG_RE.sub("", text)
     return text
 
 
 def clean_text(text: str) -> str:
-    """Clean JSX text: handle entities, expressions, whitespace."""
-    # Remove JSX comments {/* ... */}
-    text = re.sub(r"\{/\*.*?\*/\}", "", text, flags=re.DOTALL)
-    # Replace JSX string expressions like {" "} or {' '}
-    text = re.sub(r'\{"([^"]*)"\}', r"\1", text)
-    text = re.sub(r"\{'([^']*)'\}", r"\1", text)
-    # Remove remaining JSX expressions like {variable} or {fn()}
-    text = re.sub(r"\{[^}]*\}", "", text)
-    # HTML entities
-    text = text.replace("&apos;", "'")
-    text = text.replace("&quot;", '"')
-    text = text.replace("&amp;", "&")
-    text = text.replace("&lt;", "<")
-    text = text.replace("&gt;", ">")
-    text = text.replace("&mdash;", " — ")
-    text = text.replace("&ndash;", " – ")
-    text = text.replace("&hellip;", "...")
-    text = text.replace("&rarr;", "→")
-    text = text.replace("&larr;", "←")
-    text = text.replace("&times;", "×")
-    text = text.replace("&nbsp;", " ")
-    # Unicode entities
-    text = re.sub(r"&#(\d+);", lambda m: chr(int(m.group(1))), text)
-    text = re.sub(r"&#x([0-9a-fA-F]+);", lambda m: chr(int(m.group(1), 16)), text)
+    """Clean JSX text: handle entities, expressions, whitespace.
+
+    Each stage is skipped when its trigger character is absent, which is the
+    common case for prop values and plain paragraphs.
+    """
+    if "{" in text:
+        # Remove JSX comments {/* ... */}
+        if "{/*" in text:
+            text = JSX_COMMENT_RE.sub("", text)
+        # Replace JSX string expressions like {" "} or {' '}
+        text = JSX_DQ_STRING_RE.sub(r"\1", text)
+        text = JSX_SQ_STRING_RE.sub(r"\1", text)
+        # Remove remaining JSX expressions like {variable} or {fn()}
+        text = JSX_EXPRESSION_RE.sub("", text)
+    if "&" in text:
+        # HTML entities
+        text = NAMED_ENTITY_RE.sub(_named_entity, text)
+        # Unicode entities
+        if "&#" in text:
+            text = DEC_ENTITY_RE.sub(lambda m: chr(int(m.group(1))), text)
+            text = HEX_ENTITY_RE.sub(lambda m: chr(int(m.group(1), 16)), text)
     # Strip JSX tags
     text = strip_jsx_tags(text)
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    # Normalize whitespace (str.split() and \s agree on what whitespace is)
+    return " ".join(text.split())
+
+
+PARAGRAPH_CLASS_RE = re.compile(
+    r"className=[\"'][^\"']*(?:text-text-secondary|leading-relaxed)[^\"']*[\"']"
+)
+
+
+@pipeline_metrics.timed("extract.build.heading")
+def build_heading_block(inner: str) -> dict | None:
+    text = clean_text(inner)
+    if text and len(text) > 2:
+        return {"type": "heading", "text": text}
+    return None
+
+
+@pipeline_metrics.timed("extract.build.paragraph")
+def build_paragraph_block(inner: str) -> dict | None:
+    text = clean_text(inner)
+    if text and len(text) > 10:
+        return {"type": "paragraph", "text": text}
+    return None
+
+
+@pipeline_metrics.timed("extract.build.analogy")
+def build_analogy_block(attrs: str) -> dict | None:
+    concept = extract_prop(attrs, "concept")
+    analogy = extract_prop(attrs, "analogy")
+    if concept and analogy:
+        text = f"Analogy: {clean_text(concept)}. {clean_text(analogy)}"
+        return {"type": "analogy", "text": text}
+    return None
+
+
+@pipeline_metrics.timed("extract.build.term")
+def build_term_block(attrs: str) -> dict | None:
+    term = extract_prop(attrs, "term")
+    definition = extract_prop(attrs, "definition")
+    if term and definition:
+        text = f"{clean_text(term)}: {clean_text(definition)}"
+        return {"type": "term", "text": text}
+    return None
+
+
+@pipeline_metrics.timed("extract.build.info")
+def build_info_block(attrs: str, children: str) -> dict | None:
+    title = extract_prop(attrs, "title") or ""
+    inner_text = clean_text(children)
+    if inner_text and len(inner_text) > 10:
+        text = f"{clean_text(title)}: {inner_text}" if title else inner_text
+        return {"type": "info", "text": text}
+    return None
+
+
+@pipeline_metrics.timed("extract.build.reveal")
+def build_reveal_block(attrs: str, self_closing: bool) -> dict | None:
+    prompt_text = extract_prop(attrs, "prompt")
+    if not prompt_text:
+        return None
+    text = f"Knowledge check: {clean_text(prompt_text)}"
+    if self_closing:
+        answer_text = extract_prop(attrs, "answer")
+        if answer_text:
+            text += f" The answer: {clean_text(answer_text)}"
+    else:
+        # For MCQ cards, extract options
+        options = extract_prop_array(attrs, "options")
+        if options:
+            text += " Options: " + "; ".join(clean_text(o) for o in options) + "."
+    return {"type": "reveal", "text": text, "requiresReveal": True}
+
+
+class IntervalIndex:
+    """Sorted, merged set of half-open source ranges for containment queries.
+
+    Build it once per file; `contains(pos)` is a binary search, so checking
+    every tag against every range costs O(log n) per tag instead of O(n).
+    Only the regex reference path (extract_term_definitions) uses it: the
+    scanner sees tags in source order and decides containment as each <p>
+    closes (see terms_in_p), with no ranges to search.
+    """
+
+    def __init__(self, ranges: list[tuple[int, int]]):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        for start, end in sorted(ranges):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def contains(self, pos: int) -> bool:
+        i = bisect.bisect_right(self.starts, pos) - 1
+        return i >= 0 and pos < self.ends[i]
+
+
+def paragraph_index(content: str) -> IntervalIndex:
+    """Index the source range of every <p>...</p> element."""
+    return IntervalIndex([
+        (m.start(), m.end()) for m in re.finditer(r"<p\b[^>]*>.*?</p>", content, re.DOTALL)
+    ])
+
+
+# --- Regex extractors (one full-file pass per block type) ---------------------
+# Kept as the reference implementation; `extract-text.py --engine regex`
+# uses them and `--compare` checks the scanner against them.
 
 
 def extract_h3_blocks(content: str) -> list[tuple[int, dict]]:
@@ -63,9 +223,9 @@ def extract_h3_blocks(content: str) -> list[tuple[int, dict]]:
     blocks = []
     pattern = r"<h3\b[^>]*>(.*?)</h3>"
     for match in re.finditer(pattern, content, re.DOTALL):
-        text = clean_text(match.group(1))
-        if text and len(text) > 2:
-            blocks.append((match.start(), {"type": "heading", "text": text}))
+        block = build_heading_block(match.group(1))
+        if block:
+            blocks.append((match.start(), block))
     return blocks
 
 
@@ -75,9 +235,9 @@ def extract_paragraph_blocks(content: str) -> list[tuple[int, dict]]:
     # Match <p className="...text-text-secondary..."> or <p className="...leading-relaxed...">
     pattern = r"<p\b[^>]*className=[\"'][^\"']*(?:text-text-secondary|leading-relaxed)[^\"']*[\"'][^>]*>(.*?)</p>"
     for match in re.finditer(pattern, content, re.DOTALL):
-        text = clean_text(match.group(1))
-        if text and len(text) > 10:
-            blocks.append((match.start(), {"type": "paragraph", "text": text}))
+        block = build_paragraph_block(match.group(1))
+        if block:
+            blocks.append((match.start(), block))
     return blocks
 
 
@@ -86,36 +246,29 @@ def extract_analogy_cards(content: str) -> list[tuple[int, dict]]:
     blocks = []
     pattern = r"<AnalogyCard\b([^>]*)/>"
     for match in re.finditer(pattern, content, re.DOTALL):
-        attrs = match.group(1)
-        concept = extract_prop(attrs, "concept")
-        analogy = extract_prop(attrs, "analogy")
-        if concept and analogy:
-            text = f"Analogy: {clean_text(concept)}. {clean_text(analogy)}"
-            blocks.append((match.start(), {"type": "analogy", "text": text}))
+        block = build_analogy_block(match.group(1))
+        if block:
+            blocks.append((match.start(), block))
     return blocks
 
 
-def extract_term_definitions(content: str) -> list[tuple[int, dict]]:
+def extract_term_definitions(
+    content: str,
+    p_index: IntervalIndex | None = None,
+) -> list[tuple[int, dict]]:
     """Extract standalone <TermDefinition term="..." definition="..." /> (outside <p> tags)."""
     blocks = []
     # Only match TermDefinition that is NOT inside a <p> tag
-    # We'll find all TermDefinitions first, then filter out those inside paragraphs
-    p_ranges = []
-    for m in re.finditer(r"<p\b[^>]*>.*?</p>", content, re.DOTALL):
-        p_ranges.append((m.start(), m.end()))
+    if p_index is None:
+        p_index = paragraph_index(content)
 
     pattern = r"<TermDefinition\b([^>]*)/>"
     for match in re.finditer(pattern, content, re.DOTALL):
-        # Check if inside a <p> tag
-        inside_p = any(start <= match.start() < end for start, end in p_ranges)
-        if inside_p:
+        if p_index.contains(match.start()):
             continue
-        attrs = match.group(1)
-        term = extract_prop(attrs, "term")
-        definition = extract_prop(attrs, "definition")
-        if term and definition:
-            text = f"{clean_text(term)}: {clean_text(definition)}"
-            blocks.append((match.start(), {"type": "term", "text": text}))
+        block = build_term_block(match.group(1))
+        if block:
+            blocks.append((match.start(), block))
     return blocks
 
 
@@ -124,13 +277,9 @@ def extract_info_cards(content: str) -> list[tuple[int, dict]]:
     blocks = []
     pattern = r"<InfoCard\b([^>]*)>(.*?)</InfoCard>"
     for match in re.finditer(pattern, content, re.DOTALL):
-        attrs = match.group(1)
-        children = match.group(2)
-        title = extract_prop(attrs, "title") or ""
-        inner_text = clean_text(children)
-        if inner_text and len(inner_text) > 10:
-            text = f"{clean_text(title)}: {inner_text}" if title else inner_text
-            blocks.append((match.start(), {"type": "info", "text": text}))
+        block = build_info_block(match.group(1), match.group(2))
+        if block:
+            blocks.append((match.start(), block))
     return blocks
 
 
@@ -140,30 +289,181 @@ def extract_reveal_cards(content: str) -> list[tuple[int, dict]]:
     # Self-closing form
     pattern_sc = r"<RevealCard\b([^>]*)/>"
     for match in re.finditer(pattern_sc, content, re.DOTALL):
-        attrs = match.group(1)
-        prompt_text = extract_prop(attrs, "prompt")
-        answer_text = extract_prop(attrs, "answer")
-        if prompt_text:
-            text = f"Knowledge check: {clean_text(prompt_text)}"
-            if answer_text:
-                text += f" The answer: {clean_text(answer_text)}"
-            blocks.append((match.start(), {"type": "reveal", "text": text, "requiresReveal": True}))
+        block = build_reveal_block(match.group(1), self_closing=True)
+        if block:
+            blocks.append((match.start(), block))
 
     # Open/close form <RevealCard ...>...</RevealCard>
     pattern_oc = r"<RevealCard\b([^>]*)>(.*?)</RevealCard>"
     for match in re.finditer(pattern_oc, content, re.DOTALL):
-        attrs = match.group(1)
-        prompt_text = extract_prop(attrs, "prompt")
-        # For MCQ cards, extract options
-        options = extract_prop_array(attrs, "options")
-        if prompt_text:
-            text = f"Knowledge check: {clean_text(prompt_text)}"
-            if options:
-                text += " Options: " + "; ".join(clean_text(o) for o in options) + "."
-            blocks.append((match.start(), {"type": "reveal", "text": text, "requiresReveal": True}))
+        block = build_reveal_block(match.group(1), self_closing=False)
+        if block:
+            blocks.append((match.start(), block))
     return blocks
 
 
+def extract_blocks_regex(content: str) -> list[dict]:
+    """Run every regex extractor, then merge their results into DOM order."""
+    # Collect all blocks with their source positions
+    all_blocks = []
+    extractors = (
+        ("heading", extract_h3_blocks),
+        ("paragraph", extract_paragraph_blocks),
+        ("analogy", extract_analogy_cards),
+        ("term", extract_term_definitions),
+        ("info", extract_info_cards),
+        ("reveal", extract_reveal_cards),
+    )
+    for block_type, extractor in extractors:
+        with pipeline_metrics.timer(f"extract.regex.{block_type}"):
+            all_blocks.extend(extractor(content))
+
+    # Sort by source position (DOM order)
+    all_blocks.sort(key=lambda x: x[0])
+
+    # Deduplicate overlapping blocks (e.g., a RevealCard matched both patterns)
+    seen_positions = set()
+    unique_blocks = []
+    for pos, block in all_blocks:
+        # Use a range key to avoid exact duplicates
+        key = (pos, block["type"])
+        if key not in seen_positions:
+            seen_positions.add(key)
+            unique_blocks.append(block)
+    return unique_blocks
+
+
+# --- Single-pass scanner --------------------------------------------------------
+
+# Every tag the extractors care about, as one alternation: group 1 is an
+# opening tag name, group 2 a closing tag name.
+TAG_EVENT_RE = re.compile(
+    r"<(?:(h3|p|AnalogyCard|TermDefinition|InfoCard|RevealCard)\b"
+    r"|/(h3|p|InfoCard|RevealCard)>)"
+)
+
+
+class PendingElement:
+    """An opening tag waiting for the first matching closing tag."""
+
+    __slots__ = ("start", "attrs_end", "slot")
+
+    def __init__(self, start: int, attrs_end: int, slot: int | None):
+        self.start = start
+        self.attrs_end = attrs_end
+        self.slot = slot
+
+
+def extract_blocks_scan(content: str) -> list[dict]:
+    """Extract blocks in DOM order with one traversal over the tag events.
+
+    Mirrors the regex extractors exactly, including their quirks: an element
+    runs from its opening tag to the *first* following closing tag of the same
+    name (so same-name nesting is not tracked), attributes end at the first
+    `>`, and a self-closing `<RevealCard/>` also opens an element for the
+    open/close form. Each candidate block reserves an output slot when its
+    opening tag is seen, so slots are already in source order; slots are
+    filled when the element closes and dropped if it never does.
+    """
+    slots: list[dict | None] = []
+    # Pending elements for the open/close forms; "any_p" tracks every <p> for
+    # the TermDefinition containment rule, "p" only narrated paragraphs.
+    pending: dict[str, PendingElement | None] = {
+        "h3": None, "p": None, "any_p": None, "InfoCard": None, "RevealCard": None,
+    }
+    # Term slots seen while a <p> is open; dropped if that <p> closes. This is
+    # the scanner's whole containment check, O(1) per tag, so it needs no
+    # IntervalIndex or paragraph_index() pass
+    terms_in_p: list[int] = []
+    # Self-closing matches consume their tag, like re.finditer does
+    self_closing_end = {"AnalogyCard": 0, "TermDefinition": 0, "RevealCard": 0}
+    # First ">" at or after the last search start (len(content) if none).
+    # Reused while tags start before it, so runs of unterminated tags do not
+    # each rescan to the same ">" (or to the end of the file).
+    next_gt = -1
+
+    for event in TAG_EVENT_RE.finditer(content):
+        start = event.start()
+        name = event.group(1)
+
+        if name is None:
+            name = event.group(2)
+            keys = ("p", "any_p") if name == "p" else (name,)
+            for key in keys:
+                element = pending[key]
+                if element is None or start <= element.attrs_end:
+                    continue
+                pending[key] = None
+                if key == "any_p":
+                    for slot in terms_in_p:
+                        slots[slot] = None
+                    terms_in_p.clear()
+                elif key == "h3":
+                    slots[element.slot] = build_heading_block(content[element.attrs_end + 1:start])
+                elif key == "p":
+                    slots[element.slot] = build_paragraph_block(content[element.attrs_end + 1:start])
+                elif key == "InfoCard":
+                    attrs = content[element.start + len("<InfoCard"):element.attrs_end]
+                    slots[element.slot] = build_info_block(attrs, content[element.attrs_end + 1:start])
+                elif element.slot is not None:
+                    # RevealCard open/close form; a self-closing block at the
+                    # same position takes precedence
+                    attrs = content[element.start + len("<RevealCard"):element.attrs_end]
+                    slots[element.slot] = build_reveal_block(attrs, self_closing=False)
+            continue
+
+        if next_gt < event.end():
+            next_gt = content.find(">", event.end())
+            if next_gt < 0:
+                next_gt = len(content)
+        if next_gt == len(content):
+            continue
+        attrs_end = next_gt
+        attrs = content[event.end():attrs_end]
+
+        if name in ("h3", "InfoCard"):
+            if pending[name] is None:
+                slots.append(None)
+                pending[name] = PendingElement(start, attrs_end, len(slots) - 1)
+            continue
+
+        if name == "p":
+            if pending["any_p"] is None:
+                pending["any_p"] = PendingElement(start, attrs_end, None)
+                terms_in_p.clear()
+            if pending["p"] is None and PARAGRAPH_CLASS_RE.search(attrs):
+                slots.append(None)
+                pending["p"] = PendingElement(start, attrs_end, len(slots) - 1)
+            continue
+
+        # Self-closing forms: AnalogyCard, TermDefinition, RevealCard
+        slot = None
+        if start >= self_closing_end[name] and content[attrs_end - 1] == "/":
+            self_closing_end[name] = attrs_end + 1
+            sc_attrs = attrs[:-1]
+            if name == "AnalogyCard":
+                block = build_analogy_block(sc_attrs)
+            elif name == "TermDefinition":
+                block = build_term_block(sc_attrs)
+            else:
+                block = build_reveal_block(sc_attrs, self_closing=True)
+            if block:
+                slots.append(block)
+                slot = len(slots) - 1
+                if name == "TermDefinition" and pending["any_p"] is not None:
+                    terms_in_p.append(slot)
+
+        if name == "RevealCard" and pending["RevealCard"] is None:
+            if slot is None:
+                slots.append(None)
+                slot = len(slots) - 1
+                pending["RevealCard"] = PendingElement(start, attrs_end, slot)
+            else:
+                pending["RevealCard"] = PendingElement(start, attrs_end, None)
+
+    return [block for block in slots if block is not None]
+
+
 def extract_prop(attrs: str, prop_name: str) -> str | None:
     """Extract a string prop value from JSX attributes."""
     # Double-quoted: prop="value"
@@ -203,7 +503,7 @@ def extract_prop_array(attrs: str, prop_name: str) -> list[str]:
     return items
 
 
-def extract_section(section_id: str, file_path: str) -> dict:
+def extract_section(section_id: str, file_path: str, engine: str = "scan") -> dict:
     """Extract all text blocks from a section's TSX file."""
     full_path = os.path.join(PROJECT_ROOT, file_path)
     if not os.path.exists(full_path):
@@ -213,66 +513,537 @@ def extract_section(section_id: str, file_path: str) -> dict:
     with open(full_path, "r", encoding="utf-8") as f:
         content = f.read()
 
-    # Collect all blocks with their source positions
-    all_blocks = []
-    all_blocks.extend(extract_h3_blocks(content))
-    all_blocks.extend(extract_paragraph_blocks(content))
-    all_blocks.extend(extract_analogy_cards(content))
-    all_blocks.extend(extract_term_definitions(content))
-    all_blocks.extend(extract_info_cards(content))
-    all_blocks.extend(extract_reveal_cards(content))
+    return extract_section_content(section_id, content, engine)
 
-    # Sort by source position (DOM order)
-    all_blocks.sort(key=lambda x: x[0])
 
-    # Deduplicate overlapping blocks (e.g., a RevealCard matched both patterns)
-    seen_positions = set()
-    unique_blocks = []
-    for pos, block in all_blocks:
-        # Use a range key to avoid exact duplicates
-        key = (pos, block["type"])
-        if key not in seen_positions:
-            seen_positions.add(key)
-            unique_blocks.append(block)
+def extract_section_content(section_id: str, content: str, engine: str = "scan") -> dict:
+    """Extract all text blocks from already-loaded TSX source."""
+    with pipeline_metrics.timer(f"extract.{engine}"):
+        if engine == "regex":
+            blocks = extract_blocks_regex(content)
+        else:
+            blocks = extract_blocks_scan(content)
+    pipeline_metrics.count(f"extract.{engine}.chars", len(content))
+    pipeline_metrics.count("extract.blocks", len(blocks))
 
     # Add block indices
-    for i, block in enumerate(unique_blocks):
+    for i, block in enumerate(blocks):
         block["blockIndex"] = i
 
-    return {"sectionId": section_id, "blocks": unique_blocks}
+    return {"sectionId": section_id, "blocks": blocks}
+
+
+def load_index() -> dict:
+    """Load the fingerprint index used by incremental runs."""
+    try:
+        with open(INDEX_PATH, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != EXTRACTOR_VERSION:
+        return {}
+    return index.get("sections", {})
+
+
+def save_index(sections: dict) -> None:
+    tmp_path = INDEX_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": EXTRACTOR_VERSION, "sections": sections}, f, indent=2)
+    os.replace(tmp_path, INDEX_PATH)
+
+
+def write_if_changed(path: str, text: str) -> bool:
+    """Write `text` to `path` unless the file already holds exactly that.
+    Leaving identical files alone keeps their mtimes stable for downstream steps."""
+    data = text.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
 
 
-def main():
+@pipeline_metrics.timed("extract.fingerprint")
+def section_fingerprint(full_path: str, previous: dict | None) -> tuple[dict, str | None]:
+    """Fingerprint a source file as cheaply as possible.
+
+    Returns the fingerprint and the file content if it had to be read. When
+    size and mtime match `previous`, the file is not opened at all.
+    """
+    st = os.stat(full_path)
+    fingerprint = {"size": st.st_size, "mtimeNs": st.st_mtime_ns}
+    if previous and previous.get("size") == st.st_size and previous.get("mtimeNs") == st.st_mtime_ns:
+        fingerprint["sha256"] = previous["sha256"]
+        return fingerprint, None
+    with open(full_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    fingerprint["sha256"] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return fingerprint, content
+
+
+def extract_job(job: tuple[str, str, str]) -> dict:
+    """Process-pool entry point: (section id, TSX source, engine) -> result."""
+    section_id, content, engine = job
+    with pipeline_metrics.section(section_id):
+        return extract_section_content(section_id, content, engine)
+
+
+def extract_job_measured(job: tuple[str, str, str]) -> tuple[dict, dict]:
+    """extract_job for worker processes when metrics are on: also returns the
+    worker's measurements so the parent can merge them."""
+    pipeline_metrics.enable(reset=True)
+    return extract_job(job), pipeline_metrics.snapshot()
+
+
+def compare_engines() -> int:
+    """Check that the scanner and the regex extractors agree on every section."""
+    with open(MANIFEST_PATH, "r") as f:
+        manifest = json.load(f)
+
+    mismatches = 0
+    for section in manifest["sections"]:
+        scanned = extract_section(section["id"], section["file"], "scan")
+        reference = extract_section(section["id"], section["file"], "regex")
+        if scanned != reference:
+            mismatches += 1
+            print(f"MISMATCH {section['id']} ({section['file']})")
+    print(f"Compared {len(manifest['sections'])} sections: {mismatches} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+def check_outputs(engine: str) -> int:
+    """Golden check: re-extract every section in memory and compare it byte
+    for byte with the committed scripts/extracted/*.json."""
+    with open(MANIFEST_PATH, "r") as f:
+        manifest = json.load(f)
+
+    mismatches = 0
+    for section in manifest["sections"]:
+        sec_id = section["id"]
+        output_path = os.path.join(OUTPUT_DIR, f"{sec_id}.json")
+        expected = json.dumps(extract_section(sec_id, section["file"], engine), indent=2, ensure_ascii=False)
+        try:
+            with open(output_path, "r", encoding="utf-8") as f:
+                actual = f.read()
+        except OSError:
+            actual = None
+        if actual != expected:
+            mismatches += 1
+            print(f"STALE {sec_id}: {output_path} does not match {section['file']}")
+    print(f"Checked {len(manifest['sections'])} sections: {mismatches} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-i", "--incremental",
+        action="store_true",
+        help="only re-extract sections whose source changed since the last run",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("scan", "regex"),
+        default="scan",
+        help="block extractor: single-pass tag scanner (default) or the per-type regexes",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="run both engines on every section and exit non-zero if they disagree",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="verify scripts/extracted/ matches a fresh extraction without writing; exit non-zero if not",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="extract sections in N worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--ndjson",
+        metavar="PATH",
+        help="stream blocks as NDJSON records to PATH ('-' for stdout) as each section "
+             "finishes, instead of writing scripts/extracted/ (see stream_all)",
+    )
+    parser.add_argument(
+        "-w", "--watch",
+        action="store_true",
+        help="after extracting, keep polling the manifest's source files and "
+             "re-extract a section as soon as it changes, printing a block diff",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.2,
+        help="--watch polling interval in seconds (default: 0.2)",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="write per-stage timings and counters as JSON to PATH",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="run under cProfile and write the stats to PATH",
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(compare_engines())
+    if args.check:
+        sys.exit(check_outputs(args.engine))
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.ndjson and (args.incremental or args.watch):
+        parser.error("--ndjson streams every section; it cannot be combined with --incremental or --watch")
+
+    if args.ndjson:
+        if args.ndjson == "-":
+            out = contextlib.nullcontext(sys.stdout)
+        else:
+            out = open(args.ndjson, "w", encoding="utf-8")
+        # Keep stdout for the stream: any other output goes to stderr
+        with out as out, contextlib.redirect_stdout(sys.stderr):
+            if args.metrics:
+                pipeline_metrics.enable()
+            with pipeline_metrics.profiled(args.profile):
+                stream_all(args, out)
+            if args.metrics:
+                pipeline_metrics.write_report(args.metrics)
+        return
+
+    if args.metrics:
+        pipeline_metrics.enable()
+    with pipeline_metrics.profiled(args.profile):
+        extract_all(args)
+    if args.metrics:
+        pipeline_metrics.write_report(args.metrics)
+    if args.watch:
+        watch(args.engine, args.interval)
+
+
+def extract_all(args: argparse.Namespace) -> None:
+    """Extract every manifest section (or only changed ones with --incremental)."""
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     with open(MANIFEST_PATH, "r") as f:
         manifest = json.load(f)
 
+    previous_index = load_index() if args.incremental else {}
+    index = {}
+
     total_blocks = 0
     total_words = 0
+    skipped = 0
+    written = 0
 
+    # Pass 1: decide which sections need extracting and load their source
+    jobs = []
     for section in manifest["sections"]:
         sec_id = section["id"]
         file_path = section["file"]
-        label = section["label"]
+        output_path = os.path.join(OUTPUT_DIR, f"{sec_id}.json")
+        full_path = os.path.join(PROJECT_ROOT, file_path)
 
-        print(f"Extracting {sec_id} ({label}) from {file_path}...")
-        result = extract_section(sec_id, file_path)
+        if not os.path.exists(full_path):
+            print(f"  WARNING: File not found: {full_path}", file=sys.stderr)
+            jobs.append((section, None, None))
+            continue
+
+        previous = previous_index.get(sec_id)
+        if previous and previous.get("file") != file_path:
+            previous = None
+        fingerprint, content = section_fingerprint(full_path, previous)
+        fingerprint["file"] = file_path
+
+        if (
+            previous
+            and previous["sha256"] == fingerprint["sha256"]
+            and os.path.exists(output_path)
+        ):
+            fingerprint["blockCount"] = previous["blockCount"]
+            fingerprint["wordCount"] = previous["wordCount"]
+            index[sec_id] = fingerprint
+            total_blocks += previous["blockCount"]
+            total_words += previous["wordCount"]
+            skipped += 1
+            continue
+
+        if content is None:
+            with open(full_path, "r", encoding="utf-8") as f:
+                content = f.read()
+        jobs.append((section, fingerprint, content))
+
+    # Pass 2: extract, in worker processes when --jobs > 1. Results come back
+    # in submission order, so output and totals do not depend on scheduling.
+    work = [(section["id"], content or "", args.engine) for section, _, content in jobs]
+    if args.jobs > 1 and len(work) > 1:
+        job = extract_job_measured if pipeline_metrics.enabled() else extract_job
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(work))) as pool:
+            results = list(pool.map(job, work, chunksize=max(1, len(work) // (args.jobs * 4))))
+        if pipeline_metrics.enabled():
+            for _, measured in results:
+                pipeline_metrics.merge(measured)
+            results = [result for result, _ in results]
+    else:
+        results = [extract_job(item) for item in work]
+
+    # Pass 3: report and write in manifest order
+    for (section, fingerprint, _), result in zip(jobs, results):
+        sec_id = section["id"]
+        print(f"Extracting {sec_id} ({section['label']}) from {section['file']}...")
 
         block_count = len(result["blocks"])
         word_count = sum(len(b["text"].split()) for b in result["blocks"])
         total_blocks += block_count
         total_words += word_count
 
+        if fingerprint is not None:
+            fingerprint["blockCount"] = block_count
+            fingerprint["wordCount"] = word_count
+            index[sec_id] = fingerprint
+
         output_path = os.path.join(OUTPUT_DIR, f"{sec_id}.json")
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        with pipeline_metrics.section(sec_id), pipeline_metrics.timer("extract.write"):
+            changed = write_if_changed(output_path, json.dumps(result, indent=2, ensure_ascii=False))
+        if changed:
+            written += 1
+            print(f"  → {block_count} blocks, {word_count} words")
+        else:
+            print(f"  → {block_count} blocks, {word_count} words (unchanged)")
 
-        print(f"  → {block_count} blocks, {word_count} words")
+    save_index(index)
 
     print(f"\nTotal: {total_blocks} blocks, {total_words} words across {len(manifest['sections'])} sections")
+    if args.incremental:
+        print(f"Incremental: {skipped} up to date, {written} written")
     print(f"Output: {OUTPUT_DIR}/")
 
 
+def ndjson_records(result: dict) -> list[str]:
+    """One section's NDJSON lines: a record per block (sectionId, blockIndex
+    and the block's fields), then {"sectionId", "end": true, "blockCount"}
+    so a consumer knows the section is complete."""
+    sec_id = result["sectionId"]
+    lines = []
+    for block in result["blocks"]:
+        record = {"sectionId": sec_id, "blockIndex": block["blockIndex"]}
+        record.update((k, v) for k, v in block.items() if k != "blockIndex")
+        lines.append(json.dumps(record, ensure_ascii=False))
+    lines.append(json.dumps({"sectionId": sec_id, "end": True, "blockCount": len(result["blocks"])}))
+    return lines
+
+
+def stream_all(args: argparse.Namespace, out: TextIO) -> None:
+    """Extract every manifest section and write its blocks to `out` as soon
+    as that section is done (in completion order with --jobs > 1), so
+    generate-audio.py --from-ndjson can start on the first sections while
+    later ones are still being extracted. Nothing is written to
+    scripts/extracted/."""
+    with open(MANIFEST_PATH, "r") as f:
+        manifest = json.load(f)
+
+    work = []
+    for section in manifest["sections"]:
+        full_path = os.path.join(PROJECT_ROOT, section["file"])
+        if not os.path.exists(full_path):
+            print(f"  WARNING: File not found: {full_path}", file=sys.stderr)
+            work.append((section["id"], "", args.engine))
+            continue
+        with open(full_path, "r", encoding="utf-8") as f:
+            work.append((section["id"], f.read(), args.engine))
+
+    total_blocks = 0
+
+    def emit(result: dict) -> None:
+        nonlocal total_blocks
+        out.write("\n".join(ndjson_records(result)) + "\n")
+        out.flush()
+        total_blocks += len(result["blocks"])
+        print(f"Extracted {result['sectionId']}: {len(result['blocks'])} blocks")
+
+    if args.jobs > 1 and len(work) > 1:
+        job = extract_job_measured if pipeline_metrics.enabled() else extract_job
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(work))) as pool:
+            for future in as_completed([pool.submit(job, item) for item in work]):
+                result = future.result()
+                if pipeline_metrics.enabled():
+                    result, measured = result
+                    pipeline_metrics.merge(measured)
+                emit(result)
+    else:
+        for item in work:
+            emit(extract_job(item))
+
+    print(f"\nTotal: {total_blocks} blocks across {len(work)} sections")
+
+
+def describe_block(block: dict, width: int = 100) -> str:
+    text = block["text"] if len(block["text"]) <= width else block["text"][:width - 1] + "…"
+    reveal = " (reveal)" if block.get("requiresReveal") else ""
+    return f"[{block['blockIndex']}] {block['type']}{reveal}: {text}"
+
+
+def word_diff(old: str, new: str, context: int = 3) -> str:
+    """The changed words of an edited block as [-removed-]{+added+}, with a
+    few words of context around each change."""
+    a, b = old.split(), new.split()
+    parts = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            words = a[i1:i2]
+            if len(words) > 2 * context:
+                words = ([] if i1 == 0 else words[:context]) + ["…"] + ([] if i2 == len(a) else words[-context:])
+            parts.extend(words)
+            continue
+        if i2 > i1:
+            parts.append("[-" + " ".join(a[i1:i2]) + "-]")
+        if j2 > j1:
+            parts.append("{+" + " ".join(b[j1:j2]) + "+}")
+    return " ".join(parts)
+
+
+def diff_blocks(old: list[dict], new: list[dict]) -> list[str]:
+    """Block-level diff of two extractions: one line per removed (-), added
+    (+) or edited (~) block. Blocks are compared without their blockIndex,
+    so an insertion does not show every later block as changed."""
+    def key(block: dict) -> str:
+        return json.dumps({k: v for k, v in block.items() if k != "blockIndex"}, sort_keys=True)
+
+    matcher = difflib.SequenceMatcher(None, [key(b) for b in old], [key(b) for b in new], autojunk=False)
+    lines = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag == "replace" and i2 - i1 == j2 - j1:
+            # Edited in place: show only the words that changed
+            for a, b in zip(old[i1:i2], new[j1:j2]):
+                if a["text"] != b["text"] and a["type"] == b["type"]:
+                    lines.append(f"  ~ [{b['blockIndex']}] {b['type']}: {word_diff(a['text'], b['text'])}")
+                else:
+                    lines.append(f"  - {describe_block(a)}")
+                    lines.append(f"  + {describe_block(b)}")
+            continue
+        lines.extend(f"  - {describe_block(b)}" for b in old[i1:i2])
+        lines.extend(f"  + {describe_block(b)}" for b in new[j1:j2])
+    return lines
+
+
+def load_extracted(section_id: str) -> list[dict]:
+    try:
+        with open(os.path.join(OUTPUT_DIR, f"{section_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("blocks", [])
+    except (OSError, ValueError):
+        return []
+
+
+def watch(engine: str, interval: float) -> None:
+    """Poll the manifest and its section sources; re-extract only the
+    sections whose file changed and print what changed in their blocks.
+
+    Only os.stat() runs per tick (one call per manifest file), so polling
+    is cheap enough that no inotify dependency is needed. The last
+    extraction of each section is kept in memory as the diff baseline, and
+    the fingerprint index is kept current so a later --incremental run
+    does not redo the work."""
+    def stat_key(path: str) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def load_sections() -> list[dict]:
+        with open(MANIFEST_PATH, "r") as f:
+            return json.load(f)["sections"]
+
+    index = load_index()
+    manifest_key = stat_key(MANIFEST_PATH)
+    sections = load_sections()
+    files = {s["id"]: s["file"] for s in sections}
+    stats = {s["id"]: stat_key(os.path.join(PROJECT_ROOT, s["file"])) for s in sections}
+    blocks = {s["id"]: load_extracted(s["id"]) for s in sections}
+    print(f"\nWatching {len(sections)} section files (every {interval:g}s, Ctrl-C to stop)...")
+
+    try:
+        while True:
+            time.sleep(interval)
+            key = stat_key(MANIFEST_PATH)
+            if key != manifest_key:
+                manifest_key = key
+                try:
+                    sections = load_sections()
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"  WARNING: could not reload {MANIFEST_PATH}: {e}", file=sys.stderr)
+                    continue
+                print(f"Manifest changed: watching {len(sections)} section files")
+                # New or moved sections are extracted on this tick
+                for section in sections:
+                    if files.get(section["id"]) != section["file"]:
+                        stats[section["id"]] = None
+                        blocks.setdefault(section["id"], load_extracted(section["id"]))
+                files = {s["id"]: s["file"] for s in sections}
+
+            changed = False
+            for section in sections:
+                sec_id = section["id"]
+                full_path = os.path.join(PROJECT_ROOT, section["file"])
+                key = stat_key(full_path)
+                if key == stats.get(sec_id):
+                    continue
+                stats[sec_id] = key
+                if key is None:
+                    print(f"  WARNING: File not found: {full_path}", file=sys.stderr)
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    fingerprint, content = section_fingerprint(full_path, None)
+                except OSError as e:
+                    # Editors sometimes replace the file non-atomically; retry next tick
+                    print(f"  WARNING: could not read {full_path}: {e}", file=sys.stderr)
+                    stats[sec_id] = None
+                    continue
+                previous = index.get(sec_id)
+                if previous and previous.get("sha256") == fingerprint["sha256"] and previous.get("file") == section["file"]:
+                    previous.update(size=fingerprint["size"], mtimeNs=fingerprint["mtimeNs"])
+                    changed = True
+                    continue
+
+                result = extract_section_content(sec_id, content, engine)
+                output_path = os.path.join(OUTPUT_DIR, f"{sec_id}.json")
+                written = write_if_changed(output_path, json.dumps(result, indent=2, ensure_ascii=False))
+                elapsed_ms = (time.perf_counter() - start) * 1000
+
+                fingerprint["file"] = section["file"]
+                fingerprint["blockCount"] = len(result["blocks"])
+                fingerprint["wordCount"] = sum(len(b["text"].split()) for b in result["blocks"])
+                index[sec_id] = fingerprint
+                changed = True
+
+                lines = diff_blocks(blocks.get(sec_id, []), result["blocks"])
+                blocks[sec_id] = result["blocks"]
+                stamp = time.strftime("%H:%M:%S")
+                if not written:
+                    print(f"{stamp} {sec_id}: no narration change ({elapsed_ms:.1f} ms)")
+                else:
+                    print(f"{stamp} {sec_id}: {fingerprint['blockCount']} blocks, "
+                          f"{fingerprint['wordCount']} words ({elapsed_ms:.1f} ms)")
+                    print("\n".join(lines) if lines else "  (blocks unchanged; output file rewritten)")
+            if changed:
+                save_index(index)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
 if __name__ == "__main__":
     main()
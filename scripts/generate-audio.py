@@ -4,18 +4,29 @@ Generate voiceover audio using Hume AI TTS (Octave v2) with word-level timestamp
 Uses the Sitcom Girl voice with version 2 for timestamp support.
 """
 
+import argparse
 import asyncio
 import base64
+import bisect
+import hashlib
+import heapq
 import json
 import os
+import random
+import re
 import shutil
 import sys
-import tempfile
 import time
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 
 import httpx
 
+import metadata_codec
+import mp3frames
+import pipeline_metrics
+from word_timestamps import TimestampSpan, WordTimestamps
+
 PROJECT_ROOT = Path(__file__).parent.parent
 EXTRACTED_DIR = PROJECT_ROOT / "scripts" / "extracted"
 MANIFEST_PATH = PROJECT_ROOT / "scripts" / "section-manifest.json"
@@ -25,77 +36,514 @@ METADATA_OUTPUT_DIR = PROJECT_ROOT / "public" / "audio" / "metadata"
 HUME_VOICE_ID = "5bbc32c1-a1f6-44e8-bedb-9870f23619e2"  # Sitcom Girl
 HUME_VOICE_NAME = "Sitcom Girl"
 CHUNK_CHAR_LIMIT = 4500  # Hume limit ~5000 chars/request
+MIN_NARRATION_CHARS = 6  # Shorter blocks (stray labels, symbols) are not narrated
+DEFAULT_CONCURRENCY = 1  # Max in-flight TTS requests across all sections
+TTS_VERSION = "2"  # Octave version; v2 is required for word timestamps
+AUDIO_FORMAT = "mp3"
+CACHE_DIR = PROJECT_ROOT / "scripts" / ".tts-cache"
+WORK_DIR = PROJECT_ROOT / "scripts" / ".tts-work"
+DEFAULT_CACHE_MAX_MB = 1024
+DEFAULT_REQUESTS_PER_MINUTE = 120
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+DEAD_LETTER_PATH = PROJECT_ROOT / "scripts" / "tts-failures.json"
+# Rough Hume request latency for --dry-run estimates: overhead + chars / throughput
+PLAN_REQUEST_OVERHEAD_S = 1.5
+PLAN_CHARS_PER_SECOND = 600
 HUME_API_KEY = os.environ.get("HUME_API_KEY", "")
 
-if not HUME_API_KEY:
-    print("ERROR: Set HUME_API_KEY environment variable")
-    print("  export HUME_API_KEY='your-api-key-here'")
-    sys.exit(1)
-
-API_URL = "https://api.hume.ai/v0/tts"
+API_URL = os.environ.get("HUME_API_URL", "https://api.hume.ai/v0/tts")
 API_HEADERS = {
     "X-Hume-Api-Key": HUME_API_KEY,
     "Content-Type": "application/json",
 }
 
 
+def require_api_key() -> None:
+    """Exit with instructions unless HUME_API_KEY is set. Called only by code
+    paths that will talk to the API, so the module can be imported without it."""
+    if not HUME_API_KEY:
+        print("ERROR: Set HUME_API_KEY environment variable")
+        print("  export HUME_API_KEY='your-api-key-here'")
+        sys.exit(1)
+
+
+# A sentence ends at . ! or ? (plus closing quotes/brackets) before whitespace
+# and something that can start a sentence
+SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s+(?=[A-Z0-9\"'(\[])")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split whitespace-normalized text into sentences; " ".join() restores it."""
+    pieces = []
+    start = 0
+    for match in SENTENCE_END_RE.finditer(text):
+        pieces.append(text[start:match.end()].rstrip())
+        start = match.end()
+    pieces.append(text[start:])
+    return [p for p in pieces if p]
+
+
+def split_words(text: str, char_limit: int) -> list[str]:
+    """Split text at spaces into pieces of at most `char_limit` characters
+    (a single longer word is cut)."""
+    pieces = []
+    current = ""
+    for word in text.split(" "):
+        while len(word) > char_limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:char_limit])
+            word = word[char_limit:]
+        if current and len(current) + 1 + len(word) > char_limit:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def narration_blocks(blocks: list[dict]) -> list[dict]:
+    """The blocks of a section that are narrated (very short ones are dropped)."""
+    return [b for b in blocks if len(b["text"]) >= MIN_NARRATION_CHARS]
+
+
 def chunk_blocks(blocks: list[dict], char_limit: int = CHUNK_CHAR_LIMIT) -> list[list[dict]]:
-    """Split blocks into chunks that fit within the character limit."""
+    """Split blocks into chunks whose joined text fits within the character limit.
+
+    Blocks are cut into sentences (and over-long sentences into words), and
+    a DP over the ways to cut that sequence into consecutive chunks picks,
+    in order of priority: the fewest chunks, the fewest cuts inside a block,
+    and the most even chunk sizes (smallest sum of squared lengths), so there
+    is no near-empty trailing chunk and parallel chunks finish together.
+
+    A block split across chunks appears as a fragment (a copy of the block
+    with part of its text) in each; each chunk's timestamps are aligned
+    against its own fragments, and a block's fragments' words are adjacent.
+    """
+    # (block position, text, starts a block) per unit
+    units: list[tuple[int, str, bool]] = []
+    for pos, block in enumerate(blocks):
+        pieces = []
+        for sentence in split_sentences(block["text"]):
+            pieces.extend(split_words(sentence, char_limit) if len(sentence) > char_limit else [sentence])
+        for k, piece in enumerate(pieces):
+            units.append((pos, piece, k == 0))
+    if not units:
+        return []
+
+    # best[i]: (chunks, mid-block cuts, sum of squared lengths) for units[:i]
+    best: list[tuple[int, int, int] | None] = [None] * (len(units) + 1)
+    best[0] = (0, 0, 0)
+    cut_at = [0] * (len(units) + 1)
+    for i in range(1, len(units) + 1):
+        length = -1
+        for j in range(i - 1, -1, -1):
+            length += len(units[j][1]) + 1
+            if length > char_limit and j < i - 1:
+                break
+            chunks, cuts, squares = best[j]
+            candidate = (chunks + 1, cuts + (0 if units[j][2] else 1), squares + length * length)
+            if best[i] is None or candidate < best[i]:
+                best[i] = candidate
+                cut_at[i] = j
+
+    bounds = []
+    i = len(units)
+    while i > 0:
+        bounds.append((cut_at[i], i))
+        i = cut_at[i]
+
     chunks = []
-    current_chunk = []
-    current_chars = 0
+    for start, end in reversed(bounds):
+        chunk: list[dict] = []
+        texts: list[str] = []
+        for k in range(start, end):
+            pos, text, _ = units[k]
+            texts.append(text)
+            if k + 1 == end or units[k + 1][0] != pos:
+                whole = " ".join(texts)
+                block = blocks[pos]
+                chunk.append(block if whole == block["text"] else {**block, "text": whole})
+                texts = []
+        chunks.append(chunk)
+    return chunks
 
-    for block in blocks:
-        text_len = len(block["text"])
-        if current_chars + text_len > char_limit and current_chunk:
-            chunks.append(current_chunk)
-            current_chunk = []
-            current_chars = 0
-        current_chunk.append(block)
-        current_chars += text_len
 
-    if current_chunk:
-        chunks.append(current_chunk)
+def request_text(texts: list[str], batch_utterances: bool) -> str:
+    """The text that identifies a chunk's request in the cache and journal.
+
+    Batched utterances are joined with newlines, which block text never
+    contains, so the two modes only share entries for single-block chunks,
+    whose requests are identical."""
+    return ("\n" if batch_utterances else " ").join(texts)
 
-    return chunks
+
+class TTSError(Exception):
+    """Non-200 response from the TTS API."""
+
+    def __init__(self, status: int, body: str, retry_after: float | None = None):
+        super().__init__(f"Hume API error {status}: {body}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, TTSError):
+        return error.status in (408, 429) or error.status >= 500
+    # Network failures, timeouts and truncated or garbled responses
+    return isinstance(error, (httpx.TransportError, ValueError))
+
+
+class RequestScheduler:
+    """Shared gate for every TTS request.
+
+    Combines the concurrency pool, a token bucket of `requests_per_minute`
+    (bursting up to `concurrency`), and retries with exponential backoff and
+    full jitter. 429/5xx responses and network errors are retried, honouring
+    Retry-After; a 429 also pauses the whole bucket. Requests that still fail
+    are recorded in `dead_letters` instead of aborting the run.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate = requests_per_minute / 60
+        self.capacity = float(concurrency)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+        self.max_retries = max_retries
+        self.retries = 0
+        self.dead_letters: list[dict] = []
+
+    async def _take_token(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop issuing requests for `seconds` and restart with an empty bucket."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+    async def call(self, label: str, request, context: dict):
+        """Run `await request()` under the pool, rate limit and retry policy."""
+        attempt = 0
+        while True:
+            wait_start = time.perf_counter()
+            async with self.semaphore:
+                await self._take_token()
+                pipeline_metrics.observe("scheduler.wait", time.perf_counter() - wait_start)
+                try:
+                    return await request()
+                except Exception as e:
+                    error = e
+
+            if not is_retryable(error) or attempt >= self.max_retries:
+                print(f"  FAILED {label} after {attempt + 1} attempt(s): {error}")
+                self.dead_letters.append({**context, "attempts": attempt + 1, "error": str(error)})
+                raise error
+
+            delay = self.backoff(attempt)
+            retry_after = getattr(error, "retry_after", None)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if getattr(error, "status", None) == 429:
+                self.pause(delay)
+            attempt += 1
+            self.retries += 1
+            pipeline_metrics.count("tts.retries")
+            print(f"  RETRY {label} in {delay:.1f}s (attempt {attempt + 1}): {error}")
+            await asyncio.sleep(delay)
+
+
+class SectionJournal:
+    """Persistent work directory for one section's chunks.
+
+    `journal.json` records, per chunk index, the hash of the text it was
+    generated from, its status, size, duration and word timestamps. Chunks
+    are downloaded to `chunk_<i>.mp3.part` and renamed into place before they
+    are journaled as done, so a re-run resumes at the first unfinished chunk
+    and never trusts a partial file. The directory is removed once the
+    section's outputs are in place.
+    """
+
+    def __init__(self, root: Path, section_id: str):
+        self.dir = root / section_id
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.dir / "journal.json"
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def chunk_path(self, index: int) -> Path:
+        return self.dir / f"chunk_{index}.{AUDIO_FORMAT}"
+
+    def part_path(self, index: int) -> Path:
+        return self.dir / f"chunk_{index}.{AUDIO_FORMAT}.part"
+
+    def completed(self, index: int, text: str) -> dict | None:
+        """Chunk metadata if chunk `index` was finished from this exact text."""
+        entry = self.entries.get(str(index))
+        if not entry or entry["status"] != "done" or entry["textHash"] != ChunkCache.key(text):
+            return None
+        path = self.chunk_path(index)
+        if not path.exists() or path.stat().st_size != entry["sizeBytes"]:
+            return None
+        meta = {
+            "timestamps": entry["timestamps"],
+            "durationMs": entry["durationMs"],
+            "sizeBytes": entry["sizeBytes"],
+        }
+        if "utteranceWordCounts" in entry:
+            meta["utteranceWordCounts"] = entry["utteranceWordCounts"]
+        return meta
+
+    def mark_pending(self, index: int, text: str) -> None:
+        self.entries[str(index)] = {"textHash": ChunkCache.key(text), "status": "pending"}
+        self._save()
+
+    def record(self, index: int, text: str, meta: dict) -> None:
+        """Move the finished .part file into place, then journal it as done."""
+        path = self.chunk_path(index)
+        os.replace(self.part_path(index), path)
+        self.entries[str(index)] = {
+            "textHash": ChunkCache.key(text),
+            "status": "done",
+            "sizeBytes": path.stat().st_size,
+            "durationMs": meta["durationMs"],
+            "timestamps": meta["timestamps"],
+        }
+        if "utteranceWordCounts" in meta:
+            self.entries[str(index)]["utteranceWordCounts"] = meta["utteranceWordCounts"]
+        self._save()
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def discard(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class SectionFailed(Exception):
+    """One or more chunks of a section could not be generated."""
+
+
+class AudioFieldStreamer:
+    """Split a TTS JSON response as it arrives.
+
+    The base64 value of `generations[0].audio` is decoded straight into `out`
+    in 4-character-aligned pieces. Every other "audio" value (snippets carry
+    their own) is dropped, and all remaining bytes are kept so the rest of
+    the document (timestamps, duration) can be parsed afterwards with each
+    "audio" set to "". Memory use is bounded by the non-audio part of the
+    response.
+    """
+
+    JSON, AUDIO = range(2)
+    AUDIO_PATH = [b"generations", 0, b"audio"]
+
+    def __init__(self, out):
+        self.out = out
+        self.rest = bytearray()
+        self.state = self.JSON
+        # Key (bytes) or array index (int) of every open container, so the
+        # position of each value is known without parsing the document
+        self.path: list[bytes | int] = []
+        self.expect_key = False
+        self.in_string = False
+        self.in_key = False
+        self.escape = False
+        self.string_start = 0
+        self.b64_carry = b""
+        self.decoding = False
+        self.found_audio = False
+        self.bytes_written = 0
+        # Time spent in base64 decoding and in disk writes, for metrics
+        self.decode_s = 0.0
+        self.write_s = 0.0
+
+    def feed(self, data: bytes) -> None:
+        i = 0
+        n = len(data)
+        while i < n:
+            if self.state == self.AUDIO:
+                i = self._feed_audio(data, i)
+                continue
+            c = data[i]
+            self.rest.append(c)
+            i += 1
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == 0x5C:  # backslash
+                    self.escape = True
+                elif c == 0x22:  # closing quote
+                    self.in_string = False
+                    if self.in_key:
+                        self.path[-1] = bytes(self.rest[self.string_start:-1])
+            elif c == 0x22:
+                in_object = bool(self.path) and not isinstance(self.path[-1], int)
+                self.in_key = in_object and self.expect_key
+                if in_object and not self.in_key and self.path[-1] == b"audio":
+                    self.state = self.AUDIO
+                    self.decoding = not self.found_audio and self.path == self.AUDIO_PATH
+                    self.found_audio = self.found_audio or self.decoding
+                    continue
+                self.in_string = True
+                self.string_start = len(self.rest)
+            elif c == 0x7B:  # {
+                self.path.append(b"")
+                self.expect_key = True
+            elif c == 0x5B:  # [
+                self.path.append(0)
+                self.expect_key = False
+            elif c in b"]}":
+                if self.path:
+                    self.path.pop()
+                self.expect_key = False
+            elif c == 0x2C:  # comma
+                if self.path and isinstance(self.path[-1], int):
+                    self.path[-1] += 1
+                else:
+                    self.expect_key = True
+            elif c == 0x3A:  # colon
+                self.expect_key = False
+
+    def _feed_audio(self, data: bytes, i: int) -> int:
+        """Consume base64 up to the closing quote; returns the next index."""
+        end = data.find(b'"', i)
+        piece = data[i:end if end >= 0 else len(data)]
+        if self.decoding:
+            # JSON may escape "/" as "\/"; base64 has no other use for backslashes
+            buf = self.b64_carry + piece.replace(b"\\", b"")
+            cut = len(buf) - len(buf) % 4
+            if cut:
+                self._write(self._decode(buf[:cut]))
+            self.b64_carry = buf[cut:]
+        if end < 0:
+            return len(data)
+        if self.decoding and self.b64_carry:
+            self._write(self._decode(self.b64_carry + b"=" * (-len(self.b64_carry) % 4)))
+            self.b64_carry = b""
+        self.rest.append(0x22)
+        self.state = self.JSON
+        return end + 1
+
+    def _decode(self, data: bytes) -> bytes:
+        start = time.perf_counter()
+        decoded = base64.b64decode(data)
+        self.decode_s += time.perf_counter() - start
+        return decoded
+
+    def _write(self, chunk: bytes) -> None:
+        start = time.perf_counter()
+        self.out.write(chunk)
+        self.write_s += time.perf_counter() - start
+        self.bytes_written += len(chunk)
+
+    def document(self) -> dict:
+        if self.state == self.AUDIO:
+            raise ValueError("TTS response ended inside the audio field")
+        return json.loads(self.rest)
 
 
 async def generate_chunk_audio(
     http_client: httpx.AsyncClient,
     text: str,
     output_path: Path,
+    utterances: list[str] | None = None,
 ) -> dict:
     """Generate audio for a single text chunk using Hume AI TTS v2.
-    Returns metadata with word timestamps."""
-    resp = await http_client.post(
+    Returns metadata with word timestamps.
+
+    With `utterances`, each string is sent as its own utterance (instead of
+    `text` as one) and the metadata also has `utteranceWordCounts`: how many
+    of the timestamps belong to each utterance, from the snippet groups.
+
+    The response is streamed: its base64 audio is decoded straight into
+    `output_path` and never held in memory as a whole."""
+    texts = utterances if utterances is not None else [text]
+    request_start = time.perf_counter()
+    async with http_client.stream(
+        "POST",
         API_URL,
         headers=API_HEADERS,
         json={
-            "utterances": [{
-                "text": text,
-                "voice": {"id": HUME_VOICE_ID},
-            }],
-            "format": {"type": "mp3"},
+            "utterances": [
+                {"text": t, "voice": {"id": HUME_VOICE_ID}} for t in texts
+            ],
+            "format": {"type": AUDIO_FORMAT},
             "include_timestamp_types": ["word"],
-            "version": "2",
+            "version": TTS_VERSION,
         },
         timeout=120.0,
-    )
-
-    if resp.status_code != 200:
-        raise Exception(f"Hume API error {resp.status_code}: {resp.text[:300]}")
-
-    data = resp.json()
-    gen = data["generations"][0]
-
-    # Write audio to file
-    audio_bytes = base64.b64decode(gen["audio"])
-    with open(output_path, "wb") as f:
-        f.write(audio_bytes)
+    ) as resp:
+        pipeline_metrics.observe("tts.ttfb", time.perf_counter() - request_start)
+        if resp.status_code != 200:
+            body = await resp.aread()
+            raise TTSError(
+                resp.status_code,
+                body[:300].decode("utf-8", "replace"),
+                parse_retry_after(resp.headers.get("Retry-After")),
+            )
+
+        with open(output_path, "wb") as f:
+            streamer = AudioFieldStreamer(f)
+            async for data in resp.aiter_bytes():
+                streamer.feed(data)
+    pipeline_metrics.observe("tts.decode", streamer.decode_s)
+    pipeline_metrics.observe("tts.write", streamer.write_s)
+
+    parse_start = time.perf_counter()
+    gen = streamer.document()["generations"][0]
 
     # Extract word timestamps from snippets
     word_timestamps = []
+    group_word_counts = []
     for snippet_group in gen.get("snippets", []):
+        group_start = len(word_timestamps)
         for snippet in snippet_group:
             for ts in snippet.get("timestamps", []):
                 word_timestamps.append({
@@ -103,103 +551,382 @@ async def generate_chunk_audio(
                     "begin": ts["time"]["begin"],
                     "end": ts["time"]["end"],
                 })
+        group_word_counts.append(len(word_timestamps) - group_start)
 
     duration_ms = int(gen.get("duration", 0) * 1000)
     if word_timestamps and word_timestamps[-1]["end"] > duration_ms:
         duration_ms = word_timestamps[-1]["end"]
 
-    return {
+    done = time.perf_counter()
+    pipeline_metrics.observe("tts.parse", done - parse_start)
+    pipeline_metrics.observe("tts.request", done - request_start)
+    pipeline_metrics.count("tts.request.chars", len(text))
+    pipeline_metrics.count("tts.request.bytes", streamer.bytes_written)
+
+    meta = {
         "timestamps": word_timestamps,
         "durationMs": duration_ms,
-        "sizeBytes": len(audio_bytes),
+        "sizeBytes": streamer.bytes_written,
     }
+    if utterances is not None:
+        meta["utteranceWordCounts"] = group_word_counts
+    return meta
+
+
+class ChunkCache:
+    """Content-addressed store of synthesized chunks.
+
+    Entries are keyed on everything that affects the generated audio (chunk
+    text, voice, API version, format), so an edited paragraph only misses for
+    the chunk that contains it. Each entry is an MP3 plus a JSON sidecar with
+    the word timestamps. The least recently used entries are evicted whole
+    once the cache grows past `max_bytes`; file mtimes record recency.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.total_bytes = sum(
+            path.stat().st_size for paths in self._entries().values() for path in paths
+        )
+
+    @staticmethod
+    def key(text: str) -> str:
+        ident = json.dumps(
+            [text, HUME_VOICE_ID, TTS_VERSION, AUDIO_FORMAT],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+    def _entries(self) -> dict[str, list[Path]]:
+        """Files on disk grouped by entry key. Temporary files left by an
+        interrupted `put` are not part of any entry."""
+        entries: dict[str, list[Path]] = {}
+        for path in self.root.iterdir():
+            if path.is_file() and path.suffix != ".tmp":
+                entries.setdefault(path.name.split(".", 1)[0], []).append(path)
+        return entries
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.root / f"{key}.{AUDIO_FORMAT}", self.root / f"{key}.json"
+
+    def _lookup(self, key: str) -> dict | None:
+        """An entry's metadata, or None unless both files exist and the MP3
+        is the one the sidecar describes. The sidecar is renamed into place
+        last, but a crash between the renames while replacing an entry can
+        still pair a new MP3 with the previous sidecar."""
+        audio_path, meta_path = self._paths(key)
+        if not (audio_path.exists() and meta_path.exists()):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("sizeBytes") != audio_path.stat().st_size:
+            return None
+        return meta
+
+    def contains(self, text: str) -> bool:
+        """Whether `get` would hit, without touching the entry."""
+        return self._lookup(self.key(text)) is not None
+
+    @pipeline_metrics.timed("cache.get")
+    def get(self, text: str, output_path: Path) -> dict | None:
+        """Copy a cached chunk to `output_path` and return its metadata."""
+        key = self.key(text)
+        meta = self._lookup(key)
+        if meta is None:
+            self.misses += 1
+            pipeline_metrics.count("cache.misses")
+            return None
+        audio_path, meta_path = self._paths(key)
+        shutil.copyfile(audio_path, output_path)
+        now = time.time()
+        os.utime(audio_path, (now, now))
+        os.utime(meta_path, (now, now))
+        self.hits += 1
+        pipeline_metrics.count("cache.hits")
+        return meta
+
+    def discard(self, text: str) -> None:
+        """Remove an entry, e.g. one whose audio turned out to be unusable."""
+        for path in self._paths(self.key(text)):
+            if path.exists():
+                self.total_bytes -= path.stat().st_size
+                path.unlink()
+
+    @pipeline_metrics.timed("cache.put")
+    def put(self, text: str, audio_source: Path, meta: dict) -> None:
+        """Store a freshly generated chunk, then evict down to the size limit."""
+        audio_path, meta_path = self._paths(self.key(text))
+        # Write under temporary names so a crash never leaves half an entry
+        tmp_audio = audio_path.with_suffix(".tmp")
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        shutil.copyfile(audio_source, tmp_audio)
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        for path in (audio_path, meta_path):
+            if path.exists():
+                self.total_bytes -= path.stat().st_size
+        # The sidecar goes last: it is what marks the entry complete
+        os.replace(tmp_audio, audio_path)
+        os.replace(tmp_meta, meta_path)
+        self.total_bytes += audio_path.stat().st_size + meta_path.stat().st_size
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete whole entries, least recently used first, until the cache
+        fits in `max_bytes`. Entries missing their MP3 or sidecar (a crash
+        between the two renames in `put`) can never hit and go first, along
+        with any leftover temporary files."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for path in self.root.glob("*.tmp"):
+            path.unlink(missing_ok=True)
+        entries = []
+        for paths in self._entries().values():
+            stats = [path.stat() for path in paths]
+            recency = max(st.st_mtime for st in stats)
+            entries.append((len(paths) == 2, recency, sum(st.st_size for st in stats), paths))
+        entries.sort(key=lambda entry: entry[:2])
+        for _, _, size, paths in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            for path in paths:
+                path.unlink()
+            self.total_bytes -= size
+
+
+def merge_mp3_files(chunk_files: list[Path], output_path: Path) -> list[mp3frames.Mp3Info]:
+    """Merge MP3 chunks frame by frame behind one Xing/Info seek header.
+    Returns the scan of each chunk; its `duration_ms` is the real chunk
+    length, measured from its frames."""
+    return mp3frames.merge(chunk_files, output_path)
+
+
+def add_byte_ranges(
+    block_metadata: list[dict],
+    frame_offsets,
+    frame_starts,
+    sample_rate: int,
+    first_frame: int,
+    audio_bytes: int,
+) -> None:
+    """Give each narrated block the byte range of its audio in the section
+    MP3 (`beginByte` inclusive, `endByte` exclusive), on frame boundaries.
+    A player can fetch a block with one HTTP range request instead of
+    buffering the file from the start; the range starts early enough to
+    include the bit reservoir the first frame may need.
+
+    `frame_offsets`/`frame_starts` are relative to the first audio frame,
+    which starts at byte `first_frame` of the file."""
+    for block in block_metadata:
+        if not block["timestamps"]:
+            continue
+        begin = block["beginMs"] * sample_rate // 1000
+        end = max(block["endMs"], block["beginMs"]) * sample_rate // 1000
+        block["beginByte"] = first_frame + mp3frames.seek_offset(frame_offsets, frame_starts, begin)
+        block["endByte"] = first_frame + mp3frames.frame_end(frame_offsets, frame_starts, end, audio_bytes)
+
+
+async def synthesize_chunk(
+    http_client: httpx.AsyncClient,
+    scheduler: RequestScheduler,
+    chunk_text: str,
+    chunk_path: Path,
+    label: str,
+    cache: ChunkCache | None = None,
+    context: dict | None = None,
+    utterances: list[str] | None = None,
+) -> dict:
+    """Generate one chunk through the shared scheduler.
+    Served from `cache` when possible. `chunk_text` identifies the request
+    in the cache, so it must differ between batched and single-utterance
+    requests for the same text (see request_text)."""
+    start = time.perf_counter()
+    if cache is not None:
+        meta = cache.get(chunk_text, chunk_path)
+        if meta is not None:
+            print(f"  Cached {label} ({len(chunk_text)} chars)")
+            pipeline_metrics.event(
+                "chunk", label=label, source="cache", chars=len(chunk_text),
+                ms=round((time.perf_counter() - start) * 1000, 3),
+            )
+            return meta
+
+    async def request():
+        print(f"  Generating {label} ({len(chunk_text)} chars)...")
+        meta = await generate_chunk_audio(http_client, chunk_text, chunk_path, utterances)
+        # A 200 whose audio is not MP3 must never reach the cache or the
+        # journal, or every later run would reuse it and fail in the merge.
+        # ValueError is retryable, so the request is tried again.
+        if not mp3frames.scan(chunk_path).frames:
+            raise ValueError(f"no MPEG audio frames in the response ({meta['sizeBytes']} bytes)")
+        return meta
+
+    meta = await scheduler.call(label, request, context or {"chunk": label})
+    pipeline_metrics.event(
+        "chunk", label=label, source="api", chars=len(chunk_text), bytes=meta["sizeBytes"],
+        ms=round((time.perf_counter() - start) * 1000, 3),
+    )
 
+    if cache is not None:
+        cache.put(chunk_text, chunk_path, meta)
+    return meta
 
-def merge_mp3_files(chunk_files: list[Path], output_path: Path) -> None:
-    """Merge multiple MP3 files via byte concatenation."""
-    if len(chunk_files) == 1:
-        shutil.copy2(chunk_files[0], output_path)
-        return
 
-    with open(output_path, "wb") as out:
-        for chunk_file in chunk_files:
-            with open(chunk_file, "rb") as inp:
-                out.write(inp.read())
+async def process_section(
+    http_client: httpx.AsyncClient,
+    section_id: str,
+    blocks: list[dict],
+    label: str,
+    scheduler: RequestScheduler | None = None,
+    cache: ChunkCache | None = None,
+    compact_metadata: bool = False,
+    batch_utterances: bool = False,
+) -> dict | None:
+    """Process a single section: generate audio for all chunks and merge.
+
+    Chunks are fanned out through `scheduler` (one request at a time if
+    omitted) and reassembled in order, so timestamp offsets do not depend on
+    which request finishes first. Raises SectionFailed if any chunk ends up
+    in the dead-letter list; the others still complete (and are cached).
 
+    With `batch_utterances`, every block in a chunk is its own utterance and
+    the returned snippet groups give each block's timestamps directly; word
+    alignment is only used if the groups do not match the blocks."""
+    with pipeline_metrics.section(section_id), pipeline_metrics.timer("section"):
+        return await _process_section(
+            http_client, section_id, blocks, label, scheduler, cache,
+            compact_metadata, batch_utterances,
+        )
 
-async def process_section(
+
+async def _process_section(
     http_client: httpx.AsyncClient,
     section_id: str,
     blocks: list[dict],
     label: str,
+    scheduler: RequestScheduler | None,
+    cache: ChunkCache | None,
+    compact_metadata: bool,
+    batch_utterances: bool,
 ) -> dict | None:
-    """Process a single section: generate audio for all chunks and merge."""
+    if scheduler is None:
+        scheduler = RequestScheduler()
+
     print(f"\n{'='*60}")
     print(f"Processing {section_id} ({label})")
     print(f"  {len(blocks)} blocks, {sum(len(b['text'].split()) for b in blocks)} words")
 
     # Filter out very short blocks
-    narration_blocks = [b for b in blocks if len(b["text"]) > 5]
-    if not narration_blocks:
+    narrated = narration_blocks(blocks)
+    if not narrated:
         print(f"  SKIP: No narration blocks")
         return None
 
     # Chunk blocks at paragraph boundaries
-    chunks = chunk_blocks(narration_blocks)
+    chunks = chunk_blocks(narrated)
     print(f"  Split into {len(chunks)} chunk(s)")
 
-    chunk_files = []
-    chunk_metadata = []
-    cumulative_offset_ms = 0
-
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        for i, chunk_blocks_list in enumerate(chunks):
-            chunk_text = " ".join(b["text"] for b in chunk_blocks_list)
-            chunk_path = Path(tmp_dir) / f"chunk_{i}.mp3"
-
-            print(f"  Generating chunk {i+1}/{len(chunks)} ({len(chunk_text)} chars)...")
-
-            try:
-                meta = await generate_chunk_audio(http_client, chunk_text, chunk_path)
-            except Exception as e:
-                print(f"  ERROR on chunk {i+1}: {e}")
-                await asyncio.sleep(3)
-                try:
-                    meta = await generate_chunk_audio(http_client, chunk_text, chunk_path)
-                except Exception as e2:
-                    print(f"  FATAL ERROR on chunk {i+1}: {e2}")
-                    raise
-
-            # Offset timestamps by cumulative duration of previous chunks
-            for ts in meta["timestamps"]:
-                ts["begin"] += cumulative_offset_ms
-                ts["end"] += cumulative_offset_ms
-
-            chunk_files.append(chunk_path)
-            chunk_metadata.append({
-                "blocks": chunk_blocks_list,
-                "timestamps": meta["timestamps"],
-                "durationMs": meta["durationMs"],
-            })
-
-            cumulative_offset_ms += meta["durationMs"]
-
-            # Rate limit
-            await asyncio.sleep(0.5)
-
-        # Merge all chunks into final audio file
-        output_audio = AUDIO_OUTPUT_DIR / f"{section_id}.mp3"
-        merge_mp3_files(chunk_files, output_audio)
-
-    # Build metadata: assign timestamps to blocks
-    all_timestamps = []
-    for cm in chunk_metadata:
-        all_timestamps.extend(cm["timestamps"])
-
-    total_duration_ms = cumulative_offset_ms
-    file_size = output_audio.stat().st_size
-
-    block_metadata = assign_timestamps_to_blocks(narration_blocks, all_timestamps)
+    journal = SectionJournal(WORK_DIR, section_id)
+
+    async def run_chunk(i: int, chunk_blocks_list: list[dict]) -> dict:
+        texts = [b["text"] for b in chunk_blocks_list]
+        chunk_text = request_text(texts, batch_utterances)
+        chunk_label = f"{section_id} chunk {i+1}/{len(chunks)}"
+        meta = journal.completed(i, chunk_text)
+        if meta is not None:
+            print(f"  Resumed {chunk_label} from journal")
+            pipeline_metrics.count("journal.resumed")
+            return meta
+        journal.mark_pending(i, chunk_text)
+        meta = await synthesize_chunk(
+            http_client,
+            scheduler,
+            chunk_text,
+            journal.part_path(i),
+            chunk_label,
+            cache,
+            {
+                "sectionId": section_id,
+                "chunkIndex": i,
+                "chars": len(chunk_text),
+                "blockIndexes": [b["blockIndex"] for b in chunk_blocks_list],
+            },
+            texts if batch_utterances else None,
+        )
+        journal.record(i, chunk_text, meta)
+        return meta
+
+    results = await asyncio.gather(
+        *(run_chunk(i, chunk_blocks_list) for i, chunk_blocks_list in enumerate(chunks)),
+        return_exceptions=True,
+    )
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        if not all(isinstance(r, Exception) for r in failures):
+            raise next(r for r in failures if not isinstance(r, Exception))
+        raise SectionFailed(f"{len(failures)} of {len(chunks)} chunk(s) failed") from failures[0]
+
+    # Merge all chunks into final audio file. Outputs are written under .part
+    # names and renamed into place (metadata first, audio last), so a crash
+    # never leaves a half-written MP3 that a later run would treat as done.
+    chunk_paths = [journal.chunk_path(i) for i in range(len(chunks))]
+    output_audio = AUDIO_OUTPUT_DIR / f"{section_id}.mp3"
+    partial_audio = output_audio.with_name(output_audio.name + ".part")
+    with pipeline_metrics.timer("merge"):
+        try:
+            chunk_infos = merge_mp3_files(chunk_paths, partial_audio)
+        except ValueError:
+            # No chunk has any frames; each is reported and forgotten below
+            chunk_infos = [mp3frames.Mp3Info() for _ in chunk_paths]
+    silent = [i for i, info in enumerate(chunk_infos) if not info.frames]
+    if silent:
+        # Falling back to the API's duration would shift every later chunk's
+        # words again. Forget the chunks so the next run requests them anew.
+        partial_audio.unlink(missing_ok=True)
+        for i in silent:
+            text = request_text([b["text"] for b in chunks[i]], batch_utterances)
+            journal.mark_pending(i, text)
+            if cache:
+                cache.discard(text)
+        raise ValueError(f"no MPEG audio frames in chunk(s) {', '.join(str(i + 1) for i in silent)}")
+    chunk_durations = [info.duration_ms for info in chunk_infos]
+
+    # Collect every chunk's words into one columnar store, in section time.
+    # Offsets come from the frames actually written, not the API's
+    # reported durations, so they cannot drift across chunks
+    timestamps = WordTimestamps()
+    offset_ms = 0.0
+    for meta, duration_ms in zip(results, chunk_durations):
+        timestamps.extend(meta["timestamps"], round(offset_ms))
+        offset_ms += duration_ms
+    total_duration_ms = round(offset_ms)
+
+    file_size = partial_audio.stat().st_size
+    pipeline_metrics.count("merge.bytes", file_size)
+
+    block_metadata = None
+    if batch_utterances:
+        block_metadata = timestamps_by_utterance(narrated, chunks, results, timestamps)
+        if block_metadata is None:
+            print("  WARNING: snippet groups do not match the blocks; aligning words instead")
+    if block_metadata is None:
+        with pipeline_metrics.timer("align"):
+            block_metadata = assign_timestamps_to_blocks(
+                narrated, timestamps, chunks, [len(meta["timestamps"]) for meta in results],
+            )
+        pipeline_metrics.count("align.words", len(timestamps))
+
+    frame_offsets, frame_starts = mp3frames.frame_table(chunk_infos)
+    audio_bytes = sum(info.audio_bytes for info in chunk_infos)
+    # merge() writes one Info frame, then the audio frames back to back
+    add_byte_ranges(
+        block_metadata, frame_offsets, frame_starts, chunk_infos[0].sample_rate,
+        file_size - audio_bytes, audio_bytes,
+    )
 
     section_meta = {
         "sectionId": section_id,
@@ -210,8 +937,14 @@ async def process_section(
     }
 
     meta_path = METADATA_OUTPUT_DIR / f"{section_id}.json"
-    with open(meta_path, "w", encoding="utf-8") as f:
-        json.dump(section_meta, f, indent=2, ensure_ascii=False)
+    partial_meta = meta_path.with_name(meta_path.name + ".part")
+    with pipeline_metrics.timer("metadata.write"), open(partial_meta, "w", encoding="utf-8") as f:
+        f.write(metadata_codec.dumps(section_meta, compact_metadata))
+    # The MP3 goes last: its presence is what marks the section done (see
+    # load_finished_section), so a crash in between leaves it to be redone
+    os.replace(partial_meta, meta_path)
+    os.replace(partial_audio, output_audio)
+    journal.discard()
 
     print(f"  ✓ Audio: {output_audio.name} ({file_size:,} bytes, {total_duration_ms/1000:.1f}s)")
     print(f"  ✓ Metadata: {meta_path.name} ({len(block_metadata)} blocks)")
@@ -219,150 +952,700 @@ async def process_section(
     return section_meta
 
 
-def assign_timestamps_to_blocks(blocks: list[dict], word_timestamps: list[dict]) -> list[dict]:
-    """Map word-level timestamps back to text blocks using sequential matching."""
-    block_metadata = []
-    ts_index = 0
+WORD_PUNCTUATION = ".,;:!?\"'()-–—"
+ALIGN_DP_CELLS = 40_000  # Gaps larger than this use a banded DP
+ALIGN_BAND = 32  # Extra band width beyond the gap's length difference
+ALIGN_MAX_BAND = 256  # Cap on the band, so no gap costs more than O(n * 2 * cap)
+ALIGN_MAX_DEPTH = 8  # Levels of unique-token anchoring before falling back to DP
+LOW_CONFIDENCE = 0.8  # Blocks below this match ratio are reported
+
+
+def normalize_word(word: str) -> str:
+    return word.strip(WORD_PUNCTUATION).lower()
+
+
+def _unique_anchors(
+    a: list[str], a_lo: int, a_hi: int, b: list[str], b_lo: int, b_hi: int
+) -> list[tuple[int, int]]:
+    """Patience-diff anchors: tokens occurring exactly once in both ranges,
+    reduced to the longest run that is increasing in both sequences."""
+    a_pos: dict[str, int | None] = {}
+    for i in range(a_lo, a_hi):
+        a_pos[a[i]] = None if a[i] in a_pos else i
+    b_pos: dict[str, int | None] = {}
+    for j in range(b_lo, b_hi):
+        if a_pos.get(b[j]) is not None:
+            b_pos[b[j]] = None if b[j] in b_pos else j
+    pairs = sorted((a_pos[t], j) for t, j in b_pos.items() if j is not None)
+
+    # Longest increasing subsequence on b positions (patience sorting)
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    prev: list[int] = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos else -1
+    anchors = []
+    k = tail_idx[-1] if tail_idx else -1
+    while k >= 0:
+        anchors.append(pairs[k])
+        k = prev[k]
+    anchors.reverse()
+    return anchors
+
+
+def _edit_distance_pairs(
+    a: list[str], a_lo: int, a_hi: int, b: list[str], b_lo: int, b_hi: int
+) -> list[tuple[int, int]]:
+    """Align a gap with unit-cost edit distance; returns matched and
+    substituted (i, j) pairs. Large gaps are restricted to a band around the
+    gap's diagonal, keeping the cost O((n + m) * band). The band is capped,
+    but always wide enough for consecutive rows to overlap."""
+    n, m = a_hi - a_lo, b_hi - b_lo
+    if n == 0 or m == 0:
+        return []
+    if n * m <= ALIGN_DP_CELLS:
+        band = max(n, m)
+    else:
+        band = max(min(ALIGN_BAND + abs(n - m), ALIGN_MAX_BAND), -(-m // n) + 1)
+
+    inf = n + m + 1
+    # Row i covers columns [lo_i, hi_i]; moves: 0 diag, 1 up (skip a), 2 left (skip b)
+    rows_lo: list[int] = []
+    moves: list[bytearray] = []
+    prev_row: list[int] = []
+    prev_lo = 0
+    for i in range(n + 1):
+        center = i * m // n
+        lo = max(0, center - band)
+        hi = min(m, center + band)
+        row = [inf] * (hi - lo + 1)
+        move = bytearray(hi - lo + 1)
+        for j in range(lo, hi + 1):
+            if i == 0 and j == 0:
+                row[0] = 0
+                continue
+            best, step = inf, 0
+            if i > 0:
+                pj = j - 1 - prev_lo
+                if j > 0 and 0 <= pj < len(prev_row):
+                    cost = prev_row[pj] + (a[a_lo + i - 1] != b[b_lo + j - 1])
+                    if cost < best:
+                        best, step = cost, 0
+                pj = j - prev_lo
+                if 0 <= pj < len(prev_row) and prev_row[pj] + 1 < best:
+                    best, step = prev_row[pj] + 1, 1
+            if j > lo and row[j - 1 - lo] + 1 < best:
+                best, step = row[j - 1 - lo] + 1, 2
+            row[j - lo] = best
+            move[j - lo] = step
+        rows_lo.append(lo)
+        moves.append(move)
+        prev_row, prev_lo = row, lo
+
+    pairs = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        step = moves[i][j - rows_lo[i]]
+        if i > 0 and j > 0 and step == 0:
+            pairs.append((a_lo + i - 1, b_lo + j - 1))
+            i -= 1
+            j -= 1
+        elif i > 0 and (step == 1 or j == 0):
+            i -= 1
+        else:
+            j -= 1
+    pairs.reverse()
+    return pairs
+
+
+def align_tokens(a: list[str], b: list[str]) -> list[tuple[int, int]]:
+    """Align two normalized token sequences, diff style.
+
+    Common prefixes and suffixes are matched directly, tokens unique to both
+    sides anchor the rest (patience diff), and whatever is left between
+    anchors is resolved with a (banded) edit distance. Returns increasing
+    (i, j) pairs of matched or substituted tokens.
+    """
+    pairs: list[tuple[int, int]] = []
+
+    def solve(a_lo: int, a_hi: int, b_lo: int, b_hi: int, depth: int) -> None:
+        head = []
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            head.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        tail = []
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            tail.append((a_hi, b_hi))
+        pairs.extend(head)
+
+        anchors = []
+        if depth < ALIGN_MAX_DEPTH and a_lo < a_hi and b_lo < b_hi:
+            anchors = _unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi)
+        if anchors:
+            for i, j in anchors:
+                solve(a_lo, i, b_lo, j, depth + 1)
+                pairs.append((i, j))
+                a_lo, b_lo = i + 1, j + 1
+            solve(a_lo, a_hi, b_lo, b_hi, depth + 1)
+        else:
+            pairs.extend(_edit_distance_pairs(a, a_lo, a_hi, b, b_lo, b_hi))
+
+        pairs.extend(reversed(tail))
+
+    solve(0, len(a), 0, len(b), 0)
+    return pairs
+
+
+def block_entry(block: dict, timestamps: TimestampSpan, confidence: float | None = None) -> dict:
+    """Section metadata for one block and its word timestamps (a view into
+    the section's store; it serializes as the usual list of dicts)."""
+    meta = {
+        "blockIndex": block["blockIndex"],
+        "type": block["type"],
+        "text": block["text"],
+        "beginMs": timestamps[0]["begin"] if timestamps else 0,
+        "endMs": timestamps[-1]["end"] if timestamps else 0,
+        "timestamps": timestamps,
+    }
+    if confidence is not None:
+        meta["alignmentConfidence"] = confidence
+    if block.get("requiresReveal"):
+        meta["requiresReveal"] = True
+    return meta
 
-    for block in blocks:
-        block_words = block["text"].split()
-        block_ts = []
-        block_begin = None
-        block_end = None
-        words_matched = 0
 
-        for word in block_words:
-            if ts_index >= len(word_timestamps):
-                break
+def timestamps_by_utterance(
+    blocks: list[dict],
+    chunks: list[list[dict]],
+    chunk_metas: list[dict],
+    timestamps: WordTimestamps,
+) -> list[dict] | None:
+    """Block metadata from batched requests, without alignment.
+
+    `timestamps` holds every chunk's words in order. Each chunk's share is
+    split by its `utteranceWordCounts` and given to the blocks the
+    utterances came from; a block split across chunks covers its fragments'
+    words, which are adjacent. Returns None if any chunk's snippet groups do
+    not line up with its blocks (e.g. metadata from a single-utterance
+    request)."""
+    ranges: dict[int, list[int]] = {}
+    pos = 0
+    for chunk, meta in zip(chunks, chunk_metas):
+        chunk_words = len(meta["timestamps"])
+        counts = meta.get("utteranceWordCounts")
+        if counts is None and len(chunk) == 1:
+            counts = [chunk_words]
+        if counts is None or len(counts) != len(chunk) or sum(counts) != chunk_words:
+            return None
+        for fragment, n in zip(chunk, counts):
+            if fragment["blockIndex"] in ranges:
+                ranges[fragment["blockIndex"]][1] = pos + n
+            else:
+                ranges[fragment["blockIndex"]] = [pos, pos + n]
+            pos += n
+    return [
+        block_entry(block, timestamps.span(*ranges.get(block["blockIndex"], (0, 0))))
+        for block in blocks
+    ]
 
-            ts_word = word_timestamps[ts_index]["word"].strip(".,;:!?\"'()-–—")
-            block_word = word.strip(".,;:!?\"'()-–—")
 
-            if ts_word.lower() == block_word.lower() or words_matched > 0:
-                if block_begin is None:
-                    block_begin = word_timestamps[ts_index]["begin"]
-                block_end = word_timestamps[ts_index]["end"]
-                block_ts.append(word_timestamps[ts_index])
-                ts_index += 1
-                words_matched += 1
-            else:
-                # Lookahead to find match
-                for lookahead in range(1, min(5, len(word_timestamps) - ts_index)):
-                    la_word = word_timestamps[ts_index + lookahead]["word"].strip(".,;:!?\"'()-–—")
-                    if la_word.lower() == block_word.lower():
-                        ts_index += lookahead
-                        if block_begin is None:
-                            block_begin = word_timestamps[ts_index]["begin"]
-                        block_end = word_timestamps[ts_index]["end"]
-                        block_ts.append(word_timestamps[ts_index])
-                        ts_index += 1
-                        words_matched += 1
-                        break
+def assign_timestamps_to_blocks(
+    blocks: list[dict],
+    word_timestamps: WordTimestamps,
+    chunks: list[list[dict]] | None = None,
+    chunk_word_counts: list[int] | None = None,
+) -> list[dict]:
+    """Map word-level timestamps back to text blocks by sequence alignment.
+
+    Block words and returned words are normalized once and aligned as two
+    token streams (see align_tokens). Every returned word then belongs to the
+    block of the text word it aligned with; unaligned returned words belong
+    to the preceding block. Each block reports `alignmentConfidence`, the
+    fraction of its words that matched a returned word exactly.
+
+    Given the `chunks` (block fragments, as from chunk_blocks) and how many
+    of the returned words each chunk produced, every chunk is aligned on its
+    own, so the cost grows linearly with the section however repetitive its
+    text is.
+    """
+    if chunks is None:
+        chunks, chunk_word_counts = [blocks], [len(word_timestamps)]
+    position = {block["blockIndex"]: bi for bi, block in enumerate(blocks)}
+    block_token_counts = [0] * len(blocks)
+    # Normalize each distinct returned word once
+    vocabulary = [normalize_word(word) for word in word_timestamps.vocabulary]
+    ts_tokens = [vocabulary[i] for i in word_timestamps.word_ids]
+
+    ts_block: list[int | None] = [None] * len(word_timestamps)
+    exact = [0] * len(blocks)
+    ts_start = 0
+    for chunk, word_count in zip(chunks, chunk_word_counts):
+        text_tokens: list[str] = []
+        token_block: list[int] = []
+        for fragment in chunk:
+            bi = position[fragment["blockIndex"]]
+            for word in fragment["text"].split():
+                token = normalize_word(word)
+                if token:
+                    text_tokens.append(token)
+                    token_block.append(bi)
+                    block_token_counts[bi] += 1
+        chunk_tokens = ts_tokens[ts_start:ts_start + word_count]
+        for i, j in align_tokens(text_tokens, chunk_tokens):
+            ts_block[ts_start + j] = token_block[i]
+            if text_tokens[i] == chunk_tokens[j]:
+                exact[token_block[i]] += 1
+        ts_start += word_count
+
+    # Unaligned returned words join the block before them (or the first
+    # aligned block). Aligned pairs increase on both sides, so every block
+    # ends up with one contiguous range of the returned words.
+    current = next((bi for bi in ts_block if bi is not None), None)
+    block_range = [[0, 0] for _ in blocks]
+    for j, bi in enumerate(ts_block):
+        if bi is not None:
+            current = bi
+        if current is not None:
+            if block_range[current][1] == 0:
+                block_range[current][0] = j
+            block_range[current][1] = j + 1
 
-        meta = {
-            "blockIndex": block["blockIndex"],
-            "type": block["type"],
-            "text": block["text"],
-            "beginMs": block_begin or 0,
-            "endMs": block_end or 0,
-            "timestamps": block_ts,
-        }
-        if block.get("requiresReveal"):
-            meta["requiresReveal"] = True
+    block_metadata = []
+    for bi, block in enumerate(blocks):
+        confidence = exact[bi] / block_token_counts[bi] if block_token_counts[bi] else 1.0
+        meta = block_entry(block, word_timestamps.span(*block_range[bi]), round(confidence, 3))
+        if confidence < LOW_CONFIDENCE:
+            print(f"  WARNING: block {block['blockIndex']} aligned with {confidence:.0%} confidence")
 
         block_metadata.append(meta)
 
     return block_metadata
 
 
-async def main():
-    AUDIO_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    METADATA_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+def load_finished_section(sec_id: str) -> dict | None:
+    """The metadata of a section that is already generated, or None. Both
+    files must exist and the metadata must describe this MP3: regenerating
+    a section replaces the metadata first, so a run stopped before the MP3
+    was renamed into place leaves an old MP3 next to new metadata."""
+    audio_path = AUDIO_OUTPUT_DIR / f"{sec_id}.mp3"
+    meta_path = METADATA_OUTPUT_DIR / f"{sec_id}.json"
+    if not (audio_path.exists() and meta_path.exists()):
+        return None
+    meta = metadata_codec.load(meta_path)
+    if meta["fileSizeBytes"] != audio_path.stat().st_size:
+        return None
+    return meta
 
-    with open(MANIFEST_PATH) as f:
-        manifest = json.load(f)
 
-    # Check which sections already have audio (for resuming)
-    existing = set()
-    for p in AUDIO_OUTPUT_DIR.glob("*.mp3"):
-        existing.add(p.stem)
+def manifest_entry(meta: dict, label: str) -> dict:
+    """Summarize a section's metadata for the master manifest."""
+    return {
+        "sectionId": meta["sectionId"],
+        "label": label,
+        "audioFile": meta["audioFile"],
+        "totalDurationMs": meta["totalDurationMs"],
+        "fileSizeBytes": meta["fileSizeBytes"],
+        "blockCount": len(meta["blocks"]),
+    }
 
-    manifest_entries = []
-    total_duration = 0
-    total_size = 0
 
-    async with httpx.AsyncClient() as http_client:
-        for section in manifest["sections"]:
-            sec_id = section["id"]
-            label = section["label"]
+async def run_section(
+    http_client: httpx.AsyncClient,
+    scheduler: RequestScheduler,
+    section: dict,
+    existing: set[str],
+    cache: ChunkCache | None = None,
+    compact_metadata: bool = False,
+    batch_utterances: bool = False,
+    blocks: list[dict] | None = None,
+) -> dict | None:
+    """Load, skip or generate one manifest section. Returns its manifest entry.
+    `blocks` are read from EXTRACTED_DIR unless given (e.g. from a stream)."""
+    sec_id = section["id"]
+    label = section["label"]
+
+    if blocks is None:
+        # Load extracted text
+        extracted_path = EXTRACTED_DIR / f"{sec_id}.json"
+        if not extracted_path.exists():
+            print(f"SKIP {sec_id}: No extracted text (run extract-text.py first)")
+            return None
+
+        with open(extracted_path) as f:
+            extracted = json.load(f)
+        blocks = extracted.get("blocks", [])
+
+    if not blocks:
+        print(f"SKIP {sec_id}: No blocks")
+        return None
 
-            # Load extracted text
-            extracted_path = EXTRACTED_DIR / f"{sec_id}.json"
-            if not extracted_path.exists():
-                print(f"SKIP {sec_id}: No extracted text (run extract-text.py first)")
+    # Skip if already generated (delete MP3 to regenerate)
+    if sec_id in existing:
+        meta = load_finished_section(sec_id)
+        if meta is not None:
+            print(f"EXISTS {sec_id} — skipping (delete MP3 to regenerate)")
+            return manifest_entry(meta, label)
+
+    try:
+        result = await process_section(
+            http_client, sec_id, blocks, label, scheduler, cache,
+            compact_metadata, batch_utterances,
+        )
+    except SectionFailed as e:
+        print(f"FAILED {sec_id}: {e} — see {DEAD_LETTER_PATH.name}")
+        return None
+    except Exception as e:
+        # Any other failure (e.g. a chunk with no audio frames failing the
+        # merge) loses only this section; its journal is kept for the next run
+        print(f"FAILED {sec_id}: {type(e).__name__}: {e}")
+        scheduler.dead_letters.append({"sectionId": sec_id, "error": f"{type(e).__name__}: {e}"})
+        return None
+    if result:
+        return manifest_entry(result, label)
+    return None
+
+
+async def read_block_stream(path: str, sections: dict[str, asyncio.Future]) -> None:
+    """Read `extract-text.py --ndjson` records from `path` ('-' for stdin)
+    and resolve each section's future with its blocks once its end record
+    arrives. Sections that never complete resolve to None."""
+    blocks: dict[str, list[dict]] = {}
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        while line := await asyncio.to_thread(f.readline):
+            if not line.strip():
                 continue
-
-            with open(extracted_path) as f:
-                extracted = json.load(f)
-
-            blocks = extracted.get("blocks", [])
-            if not blocks:
-                print(f"SKIP {sec_id}: No blocks")
+            record = json.loads(line)
+            sec_id = record["sectionId"]
+            if sec_id not in sections:
                 continue
-
-            # Skip if already generated (delete MP3 to regenerate)
-            if sec_id in existing:
-                meta_path = METADATA_OUTPUT_DIR / f"{sec_id}.json"
-                if meta_path.exists():
-                    with open(meta_path) as f:
-                        meta = json.load(f)
-                    manifest_entries.append({
-                        "sectionId": sec_id,
-                        "label": label,
-                        "audioFile": meta["audioFile"],
-                        "totalDurationMs": meta["totalDurationMs"],
-                        "fileSizeBytes": meta["fileSizeBytes"],
-                        "blockCount": len(meta["blocks"]),
-                    })
-                    total_duration += meta["totalDurationMs"]
-                    total_size += meta["fileSizeBytes"]
-                    print(f"EXISTS {sec_id} — skipping (delete MP3 to regenerate)")
-                    continue
-
-            result = await process_section(http_client, sec_id, blocks, label)
-            if result:
-                manifest_entries.append({
-                    "sectionId": sec_id,
-                    "label": label,
-                    "audioFile": result["audioFile"],
-                    "totalDurationMs": result["totalDurationMs"],
-                    "fileSizeBytes": result["fileSizeBytes"],
-                    "blockCount": len(result["blocks"]),
-                })
-                total_duration += result["totalDurationMs"]
-                total_size += result["fileSizeBytes"]
-
-    # Write master manifest
+            if record.get("end"):
+                received = blocks.pop(sec_id, [])
+                if len(received) != record["blockCount"]:
+                    print(f"  WARNING: {sec_id}: stream had {len(received)} of {record['blockCount']} blocks")
+                    received = None
+                if not sections[sec_id].done():
+                    sections[sec_id].set_result(received)
+                continue
+            block = {k: v for k, v in record.items() if k not in ("sectionId", "blockIndex")}
+            block["blockIndex"] = record["blockIndex"]
+            blocks.setdefault(sec_id, []).append(block)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+        for future in sections.values():
+            if not future.done():
+                future.set_result(None)
+
+
+def write_master_manifest(manifest_entries: list[dict]) -> Path:
+    """Write public/audio/metadata/manifest.json from per-section entries."""
     master_manifest = {
         "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "voice": HUME_VOICE_NAME,
         "voiceId": HUME_VOICE_ID,
-        "totalDurationMs": total_duration,
-        "totalSizeBytes": total_size,
+        "totalDurationMs": sum(e["totalDurationMs"] for e in manifest_entries),
+        "totalSizeBytes": sum(e["fileSizeBytes"] for e in manifest_entries),
         "sections": manifest_entries,
     }
 
     manifest_out = METADATA_OUTPUT_DIR / "manifest.json"
     with open(manifest_out, "w", encoding="utf-8") as f:
         json.dump(master_manifest, f, indent=2, ensure_ascii=False)
+    return manifest_out
+
+
+def plan_section(
+    section: dict,
+    existing: set[str],
+    cache: ChunkCache | None,
+    batch_utterances: bool,
+) -> dict:
+    """What `run_section` would do for a section, without network access or
+    writes: its status and, per chunk, whether it would be resumed from the
+    journal, served from the cache or requested from the API."""
+    sec_id = section["id"]
+    plan = {"sectionId": sec_id, "status": "generate", "chunks": []}
+    if sec_id in existing and load_finished_section(sec_id) is not None:
+        plan["status"] = "exists"
+        return plan
+    extracted_path = EXTRACTED_DIR / f"{sec_id}.json"
+    if not extracted_path.exists():
+        plan["status"] = "no extracted text"
+        return plan
+    with open(extracted_path) as f:
+        narrated = narration_blocks(json.load(f).get("blocks", []))
+    if not narrated:
+        plan["status"] = "no narration blocks"
+        return plan
+
+    # SectionJournal creates its directory, so only open one that exists
+    journal = SectionJournal(WORK_DIR, sec_id) if (WORK_DIR / sec_id).is_dir() else None
+    for i, chunk in enumerate(chunk_blocks(narrated)):
+        text = request_text([b["text"] for b in chunk], batch_utterances)
+        if journal is not None and journal.completed(i, text) is not None:
+            source = "journal"
+        elif cache is not None and cache.contains(text):
+            source = "cache"
+        else:
+            source = "api"
+        plan["chunks"].append({
+            "chunkIndex": i,
+            "chars": len(text),
+            "blockIndexes": [b["blockIndex"] for b in chunk],
+            "source": source,
+        })
+    return plan
+
+
+def estimate_wall_time(durations: list[float], concurrency: int, requests_per_minute: float) -> float:
+    """Seconds for requests of the given durations, started in order through
+    a RequestScheduler with these limits, assuming no retries."""
+    rate = requests_per_minute / 60
+    tokens = float(concurrency)
+    updated = 0.0
+    free_at = [0.0] * concurrency
+    finish = 0.0
+    for duration in durations:
+        start = max(heapq.heappop(free_at), updated)
+        tokens = min(float(concurrency), tokens + (start - updated) * rate)
+        if tokens < 1:
+            start += (1 - tokens) / rate
+            tokens = 1.0
+        updated = start
+        tokens -= 1
+        heapq.heappush(free_at, start + duration)
+        finish = max(finish, start + duration)
+    return finish
+
+
+def plan_all(args: argparse.Namespace) -> None:
+    """Print the requests a run with these arguments would pay for, per
+    section and chunk, and an estimate of its wall time. Offline."""
+    with open(MANIFEST_PATH) as f:
+        manifest = json.load(f)
+    existing = {p.stem for p in AUDIO_OUTPUT_DIR.glob("*.mp3")}
+    cache = None
+    if not args.no_cache and args.cache_dir.is_dir():
+        cache = ChunkCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+
+    paid_chars = []
+    totals = {"journal": 0, "cache": 0, "api": 0}
+    generated = 0
+    for section in manifest["sections"]:
+        plan = plan_section(section, existing, cache, args.batch_utterances)
+        sec_id = plan["sectionId"]
+        if plan["status"] != "generate":
+            print(f"SKIP {sec_id}: {plan['status']}")
+            continue
+        generated += 1
+        chunks = plan["chunks"]
+        counts = {source: sum(c["source"] == source for c in chunks) for source in totals}
+        for source, n in counts.items():
+            totals[source] += n
+        print(
+            f"PLAN {sec_id}: {len(chunks)} chunk(s), {sum(c['chars'] for c in chunks):,} chars, "
+            f"{counts['api']} request(s) ({counts['cache']} cached, {counts['journal']} resumed)"
+        )
+        for chunk in chunks:
+            if chunk["source"] == "api":
+                paid_chars.append(chunk["chars"])
+                blocks = chunk["blockIndexes"]
+                print(f"  API chunk {chunk['chunkIndex'] + 1}/{len(chunks)}: {chunk['chars']:,} chars, "
+                      f"blocks {blocks[0]}-{blocks[-1]}")
+
+    durations = [PLAN_REQUEST_OVERHEAD_S + chars / PLAN_CHARS_PER_SECOND for chars in paid_chars]
+    wall_s = estimate_wall_time(durations, args.concurrency, args.rpm)
+    print(f"\n{'='*60}")
+    print("DRY RUN (no requests made)")
+    print(f"  Sections to generate: {generated}")
+    print(f"  Chunks: {sum(totals.values())} ({totals['cache']} cached, {totals['journal']} resumed)")
+    print(f"  API requests: {totals['api']}, {sum(paid_chars):,} chars")
+    print(f"  Estimated wall time: {wall_s / 60:.1f} min at concurrency {args.concurrency}, "
+          f"{args.rpm:g} rpm (assumes {PLAN_CHARS_PER_SECOND} chars/s per request, no retries)")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"max in-flight TTS requests across all sections (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=DEFAULT_REQUESTS_PER_MINUTE,
+        help=f"request quota per minute (default: {DEFAULT_REQUESTS_PER_MINUTE})",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"retries per chunk for 429/5xx/network errors (default: {DEFAULT_MAX_RETRIES})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help="directory for cached chunk audio (default: scripts/.tts-cache)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"evict least recently used chunks above this size (default: {DEFAULT_CACHE_MAX_MB})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always call the API and do not store results",
+    )
+    parser.add_argument(
+        "--compact-metadata",
+        action="store_true",
+        help="write section metadata in the compact columnar format (see metadata_codec.py)",
+    )
+    parser.add_argument(
+        "--from-ndjson",
+        metavar="PATH",
+        help="read blocks from `extract-text.py --ndjson` output at PATH ('-' for stdin) "
+             "instead of scripts/extracted/, starting each section as soon as it arrives",
+    )
+    parser.add_argument(
+        "--batch-utterances",
+        action="store_true",
+        help="send each block as its own utterance and take block timings from the response",
+    )
+    parser.add_argument(
+        "-n", "--dry-run",
+        action="store_true",
+        help="print the API requests a run would make and an estimated wall time, "
+             "without network access or writing anything",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        metavar="PATH",
+        help="write per-stage timings, counters and per-chunk rows as JSON to PATH",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="PATH",
+        help="run under cProfile and write the stats to PATH",
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.rpm <= 0:
+        parser.error("--rpm must be positive")
+    if args.max_retries < 0:
+        parser.error("--max-retries cannot be negative")
+    if args.dry_run and args.from_ndjson:
+        parser.error("--dry-run reads scripts/extracted/ and cannot be combined with --from-ndjson")
+    return args
+
+
+async def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    if args.dry_run:
+        plan_all(args)
+        return
+    require_api_key()
+
+    if args.metrics:
+        pipeline_metrics.enable()
+    with pipeline_metrics.profiled(args.profile):
+        ok = await generate_all(args)
+    if args.metrics:
+        pipeline_metrics.write_report(args.metrics)
+    if not ok:
+        sys.exit(1)
+
+
+async def generate_all(args: argparse.Namespace) -> bool:
+    """Generate every manifest section and the master manifest.
+    Returns False if any chunk or section ended up in the dead-letter list."""
+    AUDIO_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    METADATA_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(MANIFEST_PATH) as f:
+        manifest = json.load(f)
+
+    # Check which sections already have audio (for resuming)
+    existing = set()
+    for p in AUDIO_OUTPUT_DIR.glob("*.mp3"):
+        existing.add(p.stem)
+
+    # One scheduler bounds requests across all sections; sections and their
+    # chunks are scheduled together and results are collected in manifest order.
+    scheduler = RequestScheduler(args.concurrency, args.rpm, args.max_retries)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    cache = None if args.no_cache else ChunkCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+
+    streamed: dict[str, asyncio.Future] = {}
+    reader = None
+    if args.from_ndjson:
+        loop = asyncio.get_running_loop()
+        streamed = {section["id"]: loop.create_future() for section in manifest["sections"]}
+        reader = asyncio.create_task(read_block_stream(args.from_ndjson, streamed))
+
+    async def section_entry(section: dict) -> dict | None:
+        blocks = None
+        if streamed:
+            blocks = await streamed[section["id"]]
+            if blocks is None:
+                print(f"SKIP {section['id']}: not complete in {args.from_ndjson}")
+                return None
+        return await run_section(
+            http_client, scheduler, section, existing, cache,
+            args.compact_metadata, args.batch_utterances, blocks,
+        )
+
+    async with httpx.AsyncClient(limits=limits) as http_client:
+        if args.concurrency == 1:
+            entries = [await section_entry(section) for section in manifest["sections"]]
+        else:
+            entries = await asyncio.gather(*(section_entry(section) for section in manifest["sections"]))
+    if reader is not None:
+        # Surfaces a malformed stream (all futures are resolved either way)
+        await reader
+
+    manifest_entries = [e for e in entries if e]
+    total_duration = sum(e["totalDurationMs"] for e in manifest_entries)
+    total_size = sum(e["fileSizeBytes"] for e in manifest_entries)
+    manifest_out = write_master_manifest(manifest_entries)
 
     print(f"\n{'='*60}")
     print(f"COMPLETE")
     print(f"  Sections: {len(manifest_entries)}")
     print(f"  Total duration: {total_duration/1000/60:.1f} minutes")
     print(f"  Total size: {total_size/1024/1024:.1f} MB")
+    if cache is not None:
+        print(f"  Chunk cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    print(f"  Retries: {scheduler.retries}")
     print(f"  Manifest: {manifest_out}")
 
+    if scheduler.dead_letters:
+        with open(DEAD_LETTER_PATH, "w", encoding="utf-8") as f:
+            json.dump(scheduler.dead_letters, f, indent=2, ensure_ascii=False)
+        print(f"  FAILED: {len(scheduler.dead_letters)} chunk(s) or section(s), listed in {DEAD_LETTER_PATH}")
+        return False
+    DEAD_LETTER_PATH.unlink(missing_ok=True)
+    return True
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Add or refresh the per-block byte ranges (beginByte/endByte) in existing
+section metadata by scanning each section's MP3, without calling the TTS API.
+generate-audio.py writes them for every section it generates; this backfills
+metadata written before that, in its existing plain or compact format.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import metadata_codec
+import mp3frames
+from script_loader import load_script
+
+
+def index_section(ga, meta_path: Path, check: bool) -> str:
+    """Index one section; returns "indexed", "current", "stale" or a SKIP reason."""
+    with open(meta_path, encoding="utf-8") as f:
+        doc = json.load(f)
+    compact = metadata_codec.is_compact(doc)
+    meta = metadata_codec.decode(doc)
+    audio_path = ga.PROJECT_ROOT / "public" / meta["audioFile"].lstrip("/")
+    if not audio_path.exists():
+        return f"no audio file {audio_path.name}"
+
+    info = mp3frames.scan(audio_path)
+    if not info.frames:
+        return "no MPEG audio frames"
+    if len(info.runs) != 1:
+        # Offsets are relative to the first frame, so they need contiguous audio
+        return f"audio frames are not contiguous ({len(info.runs)} runs)"
+
+    before = [(b.get("beginByte"), b.get("endByte")) for b in meta["blocks"]]
+    ga.add_byte_ranges(
+        meta["blocks"], info.frame_offsets, info.frame_starts, info.sample_rate,
+        info.runs[0][0], info.audio_bytes,
+    )
+    if before == [(b.get("beginByte"), b.get("endByte")) for b in meta["blocks"]]:
+        return "current"
+    if check:
+        return "stale"
+    with open(meta_path, "w", encoding="utf-8") as f:
+        f.write(metadata_codec.dumps(meta, compact))
+    return "indexed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sections", nargs="*", help="only these section ids (default: all with metadata)")
+    parser.add_argument("--check", action="store_true",
+                        help="do not write; exit non-zero if any byte range is missing or stale")
+    args = parser.parse_args()
+
+    ga = load_script("generate-audio.py")
+    if args.sections:
+        paths = [ga.METADATA_OUTPUT_DIR / f"{sec_id}.json" for sec_id in args.sections]
+    else:
+        paths = sorted(ga.METADATA_OUTPUT_DIR.glob("sec-*.json"))
+
+    counts: dict[str, int] = {}
+    for path in paths:
+        if not path.exists():
+            status = "no metadata"
+        else:
+            status = index_section(ga, path, args.check)
+        if status in ("indexed", "current", "stale"):
+            counts[status] = counts.get(status, 0) + 1
+            if status != "current":
+                print(f"{status.upper()} {path.stem}")
+        else:
+            counts["skipped"] = counts.get("skipped", 0) + 1
+            print(f"SKIP {path.stem}: {status}")
+
+    print("\n" + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+    if args.check and counts.get("stale"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
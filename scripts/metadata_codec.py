@@ -0,0 +1,118 @@
+"""
+Compact encoding of per-section voiceover metadata.
+
+The plain format stores one {word, begin, end} object per word. The compact
+format keeps the section and block fields as they are, but replaces each
+block's `timestamps` with three parallel integer columns:
+
+  w  index into the section-level `words` vocabulary (most frequent first)
+  g  gap before the word: begin minus the previous word's end
+     (the block's beginMs for the first word); may be negative
+  d  duration: end minus begin (the API occasionally returns end < begin)
+
+and is written without indentation. Decoding is lossless.
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+COMPACT_FORMAT = "compact-v1"
+
+
+def is_compact(data: dict) -> bool:
+    return data.get("format") == COMPACT_FORMAT
+
+
+def encode(meta: dict) -> dict:
+    """Plain section metadata -> compact document."""
+    counts = Counter(ts["word"] for block in meta["blocks"] for ts in block["timestamps"])
+    # sorted() is stable, so ties keep first-seen order and output is deterministic
+    words = [word for word, _ in sorted(counts.items(), key=lambda kv: -kv[1])]
+    index = {word: i for i, word in enumerate(words)}
+
+    blocks = []
+    for block in meta["blocks"]:
+        w, g, d = [], [], []
+        prev = block["beginMs"]
+        for ts in block["timestamps"]:
+            w.append(index[ts["word"]])
+            g.append(ts["begin"] - prev)
+            d.append(ts["end"] - ts["begin"])
+            prev = ts["end"]
+        out = {}
+        for key, value in block.items():
+            if key == "timestamps":
+                out.update(w=w, g=g, d=d)
+            else:
+                out[key] = value
+        blocks.append(out)
+
+    doc = {"format": COMPACT_FORMAT}
+    doc.update((k, v) for k, v in meta.items() if k != "blocks")
+    doc["words"] = words
+    doc["blocks"] = blocks
+    return doc
+
+
+def decode(doc: dict) -> dict:
+    """Compact document -> plain section metadata (plain input is returned as is)."""
+    if not is_compact(doc):
+        return doc
+    words = doc["words"]
+    blocks = []
+    for block in doc["blocks"]:
+        timestamps = []
+        prev = block["beginMs"]
+        for w, g, d in zip(block["w"], block["g"], block["d"]):
+            begin = prev + g
+            prev = begin + d
+            timestamps.append({"word": words[w], "begin": begin, "end": prev})
+        out = {}
+        for key, value in block.items():
+            if key == "w":
+                out["timestamps"] = timestamps
+            elif key not in ("g", "d"):
+                out[key] = value
+        blocks.append(out)
+
+    meta = {k: v for k, v in doc.items() if k not in ("format", "words", "blocks")}
+    meta["blocks"] = blocks
+    return meta
+
+
+def check(doc: dict) -> list[str]:
+    """Structural problems in a compact document (empty if it is valid)."""
+    if not is_compact(doc):
+        return [f"format is {doc.get('format')!r}, expected {COMPACT_FORMAT!r}"]
+    problems = []
+    vocab = len(doc["words"])
+    for block in doc["blocks"]:
+        label = f"block {block.get('blockIndex')}"
+        columns = [block.get(k) for k in ("w", "g", "d")]
+        if any(c is None for c in columns):
+            problems.append(f"{label}: missing w/g/d columns")
+            continue
+        w, g, d = columns
+        if not len(w) == len(g) == len(d):
+            problems.append(f"{label}: columns differ in length ({len(w)}, {len(g)}, {len(d)})")
+        if any(not 0 <= i < vocab for i in w):
+            problems.append(f"{label}: word index out of range")
+        if w and sum(g) + sum(d) != block["endMs"] - block["beginMs"]:
+            problems.append(f"{label}: timings do not end at endMs")
+    return problems
+
+
+def dumps(meta: dict, compact: bool = False) -> str:
+    """Serialize plain section metadata in the plain or compact format.
+    Timestamps may be any sequence of {word, begin, end} (e.g. the
+    TimestampSpan views generate-audio.py uses)."""
+    if compact:
+        return json.dumps(encode(meta), ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(meta, indent=2, ensure_ascii=False, default=list)
+
+
+def load(path: Path) -> dict:
+    """Read a section metadata file in either format, as plain metadata."""
+    with open(path, encoding="utf-8") as f:
+        return decode(json.load(f))
@@ -0,0 +1,330 @@
+"""
+Minimal MPEG audio frame parser used by the voiceover scripts.
+Finds frame boundaries, skips ID3/Xing/Info/VBRI metadata, measures real
+durations from frame counts, and merges files frame-by-frame behind a single
+Xing/Info seek header.
+"""
+
+import bisect
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Bitrates in kbps, indexed by the 4-bit header field (0 = free format, 15 = bad)
+BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+VERSION_BITS = {0: 2.5, 2: 2, 3: 1}
+LAYER_BITS = {1: 3, 2: 2, 3: 1}
+MONO = 3
+
+READ_SIZE = 1 << 16  # Bounded buffer for scanning and copying
+# Layer III frames can borrow up to 511 bytes of main data from the frames
+# before them (main_data_begin), so decoding from a cut needs those bytes too
+BIT_RESERVOIR_BYTES = 511
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    raw: bytes
+    version: float  # 1, 2 or 2.5
+    layer: int
+    bitrate_index: int
+    sample_rate: int
+    padding: int
+    channel_mode: int
+    protected: bool  # CRC follows the header
+
+    @property
+    def bitrate(self) -> int:
+        """Bitrate in kbps."""
+        return BITRATES[(1 if self.version == 1 else 2, self.layer)][self.bitrate_index]
+
+    @property
+    def samples(self) -> int:
+        """PCM samples per channel in this frame."""
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and self.version != 1:
+            return 576
+        return 1152
+
+    @property
+    def length(self) -> int:
+        """Frame length in bytes, header included."""
+        if self.layer == 1:
+            return (12 * self.bitrate * 1000 // self.sample_rate + self.padding) * 4
+        return self.samples // 8 * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def side_info_size(self) -> int:
+        """Bytes between the header (and CRC) and the main data of a Layer III frame."""
+        if self.version == 1:
+            return 17 if self.channel_mode == MONO else 32
+        return 9 if self.channel_mode == MONO else 17
+
+
+def parse_header(data: bytes, offset: int = 0) -> FrameHeader | None:
+    """Decode the 4-byte frame header at `offset`, or None if it is not one."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset:offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = VERSION_BITS.get((b1 >> 3) & 0x03)
+    layer = LAYER_BITS.get((b1 >> 1) & 0x03)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sr_index = (b2 >> 2) & 0x03
+    # Free-format (0) and reserved values cannot be sized without decoding
+    if version is None or layer is None or bitrate_index in (0, 15) or sr_index == 3:
+        return None
+    return FrameHeader(
+        raw=bytes(data[offset:offset + 4]),
+        version=version,
+        layer=layer,
+        bitrate_index=bitrate_index,
+        sample_rate=SAMPLE_RATES[version][sr_index],
+        padding=(b2 >> 1) & 0x01,
+        channel_mode=(b3 >> 6) & 0x03,
+        protected=not (b1 & 0x01),
+    )
+
+
+def id3v2_size(head: bytes) -> int:
+    """Size of a leading ID3v2 tag (0 if there is none)."""
+    if len(head) < 10 or head[:3] != b"ID3":
+        return 0
+    size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def is_info_frame(frame: bytes, header: FrameHeader) -> bool:
+    """True for a Xing/Info or VBRI metadata frame (no audio to keep)."""
+    xing_at = 4 + (2 if header.protected else 0) + header.side_info_size
+    if frame[xing_at:xing_at + 4] in (b"Xing", b"Info"):
+        return True
+    return frame[36:40] == b"VBRI"
+
+
+@dataclass
+class Mp3Info:
+    """Result of scanning one MP3 file."""
+    frames: int = 0
+    samples: int = 0
+    sample_rate: int = 0
+    audio_bytes: int = 0
+    first_header: FrameHeader | None = None
+    cbr: bool = True
+    # (offset, length) of contiguous runs of audio frames in the file
+    runs: list[tuple[int, int]] = field(default_factory=list)
+    # Byte offset (relative to the first audio frame) and starting sample of
+    # every frame, for seek tables and segment indexes
+    frame_offsets: array = field(default_factory=lambda: array("q"))
+    frame_starts: array = field(default_factory=lambda: array("q"))
+
+    @property
+    def duration_ms(self) -> float:
+        return self.samples * 1000 / self.sample_rate if self.sample_rate else 0.0
+
+
+def scan(path: Path) -> Mp3Info:
+    """Walk the frames of an MP3 file with a bounded read buffer.
+
+    Leading ID3v2 and trailing ID3v1/APE data and any Xing/Info/VBRI frame
+    are skipped; garbage between frames is resynchronised over and excluded
+    from `runs`.
+    """
+    info = Mp3Info()
+    with open(path, "rb") as f:
+        head = f.read(10)
+        pos = id3v2_size(head)
+        f.seek(pos)
+        buf = f.read(READ_SIZE)
+        buf_start = pos
+        first = True
+
+        while True:
+            rel = pos - buf_start
+            if rel + 4 > len(buf):
+                f.seek(pos)
+                buf = f.read(READ_SIZE)
+                buf_start = pos
+                rel = 0
+                if len(buf) < 4:
+                    break
+            header = parse_header(buf, rel)
+            if header is None:
+                pos += 1
+                continue
+            length = header.length
+            if rel + length + 4 > len(buf):
+                f.seek(pos)
+                buf = f.read(max(READ_SIZE, length + 4))
+                buf_start = pos
+                rel = 0
+                if len(buf) < length:
+                    break  # Truncated final frame
+            # Require the next frame (or end of data) to line up, to avoid false syncs
+            nxt = rel + length
+            if nxt + 4 <= len(buf) and parse_header(buf, nxt) is None and buf[nxt:nxt + 3] not in (b"TAG", b"APE"):
+                if info.frames == 0:
+                    pos += 1
+                    continue
+            if first and is_info_frame(buf[rel:rel + length], header):
+                first = False
+                pos += length
+                continue
+            first = False
+
+            if info.first_header is None:
+                info.first_header = header
+                info.sample_rate = header.sample_rate
+            elif header.bitrate_index != info.first_header.bitrate_index:
+                info.cbr = False
+            info.frame_offsets.append(info.audio_bytes)
+            info.frame_starts.append(info.samples)
+            info.frames += 1
+            info.samples += header.samples
+            info.audio_bytes += length
+            if info.runs and info.runs[-1][0] + info.runs[-1][1] == pos:
+                info.runs[-1] = (info.runs[-1][0], info.runs[-1][1] + length)
+            else:
+                info.runs.append((pos, length))
+            pos += length
+    return info
+
+
+def build_info_frame(template: FrameHeader, frames: int, total_bytes: int, toc: bytes, cbr: bool) -> bytes:
+    """Build a Xing (VBR) or Info (CBR) header frame matching `template`'s
+    version, sample rate and channel mode. `frames` counts audio frames only."""
+    side = template.side_info_size
+    needed = 4 + side + 4 + 4 + 4 + 4 + 100
+    for bitrate_index in range(1, 15):
+        header = FrameHeader(
+            raw=b"",
+            version=template.version,
+            layer=template.layer,
+            bitrate_index=bitrate_index,
+            sample_rate=template.sample_rate,
+            padding=0,
+            channel_mode=template.channel_mode,
+            protected=False,
+        )
+        if header.length >= needed:
+            break
+    else:
+        raise ValueError("No bitrate gives a frame large enough for a Xing header")
+
+    raw = bytearray(template.raw)
+    raw[1] |= 0x01  # No CRC
+    raw[2] = (bitrate_index << 4) | (raw[2] & 0x0C)  # Keep sample rate, clear padding/private
+    frame = bytearray(header.length)
+    frame[0:4] = raw
+    at = 4 + side
+    frame[at:at + 4] = b"Info" if cbr else b"Xing"
+    frame[at + 4:at + 8] = (0x07).to_bytes(4, "big")  # frames, bytes and TOC present
+    frame[at + 8:at + 12] = frames.to_bytes(4, "big")
+    frame[at + 12:at + 16] = total_bytes.to_bytes(4, "big")
+    frame[at + 16:at + 116] = toc
+    return bytes(frame)
+
+
+def build_toc(frame_offsets: array, frame_starts: array, total_samples: int, header_bytes: int, total_bytes: int) -> bytes:
+    """Xing table of contents: for each percent of playback time, the byte
+    position in the file scaled to 0-255."""
+    toc = bytearray(100)
+    for pct in range(100):
+        target = total_samples * pct // 100
+        i = max(0, bisect.bisect_right(frame_starts, target) - 1)
+        offset = header_bytes + (frame_offsets[i] if len(frame_offsets) else 0)
+        toc[pct] = min(255, offset * 256 // total_bytes)
+    return bytes(toc)
+
+
+def frame_table(infos: list[Mp3Info]) -> tuple[array, array]:
+    """Byte offset (relative to the first audio frame) and starting sample of
+    every frame in `infos` played back to back, as merge() writes them."""
+    frame_offsets = array("q")
+    frame_starts = array("q")
+    audio_bytes = 0
+    samples = 0
+    for info in infos:
+        frame_offsets.extend(o + audio_bytes for o in info.frame_offsets)
+        frame_starts.extend(s + samples for s in info.frame_starts)
+        audio_bytes += info.audio_bytes
+        samples += info.samples
+    return frame_offsets, frame_starts
+
+
+def seek_offset(
+    frame_offsets: array, frame_starts: array, sample: int, reservoir: int = BIT_RESERVOIR_BYTES
+) -> int:
+    """Offset of the frame to start reading from to play `sample`: the frame
+    containing it, moved back whole frames until at least `reservoir` bytes
+    of earlier audio are included (or the first frame is reached)."""
+    i = max(0, bisect.bisect_right(frame_starts, sample) - 1)
+    target = frame_offsets[i] - reservoir
+    j = max(0, bisect.bisect_right(frame_offsets, target) - 1)
+    return frame_offsets[j]
+
+
+def frame_end(frame_offsets: array, frame_starts: array, sample: int, audio_bytes: int) -> int:
+    """Offset just past the frame containing `sample`."""
+    i = bisect.bisect_right(frame_starts, sample)
+    return frame_offsets[i] if i < len(frame_offsets) else audio_bytes
+
+
+def merge(chunk_files: list[Path], output_path: Path) -> list[Mp3Info]:
+    """Concatenate the audio frames of `chunk_files` into `output_path`.
+
+    Per-chunk ID3 tags and Xing/Info/VBRI frames are dropped and a single
+    Info/Xing frame with a seek table is written first, so players know the
+    duration and can seek without scanning the file. Returns the scan of
+    every chunk, in order; their `duration_ms` are the real chunk lengths.
+    """
+    infos = [scan(path) for path in chunk_files]
+    audio = [info for info in infos if info.frames]
+    if not audio:
+        raise ValueError(f"No MPEG audio frames found in {', '.join(map(str, chunk_files))}")
+
+    frame_offsets, frame_starts = frame_table(audio)
+    audio_bytes = sum(info.audio_bytes for info in audio)
+    samples = sum(info.samples for info in audio)
+    frames = len(frame_offsets)
+    template = audio[0].first_header
+    cbr = all(info.cbr and info.first_header.bitrate_index == template.bitrate_index for info in audio)
+
+    # Size the header frame first (its length does not depend on the TOC)
+    header_len = len(build_info_frame(template, frames, 0, bytes(100), cbr))
+    total_bytes = header_len + audio_bytes
+    toc = build_toc(frame_offsets, frame_starts, samples, header_len, total_bytes)
+
+    with open(output_path, "wb") as out:
+        out.write(build_info_frame(template, frames, total_bytes, toc, cbr))
+        for path, info in zip(chunk_files, infos):
+            with open(path, "rb") as inp:
+                for offset, length in info.runs:
+                    inp.seek(offset)
+                    copy_range(inp, out, length)
+    return infos
+
+
+def copy_range(inp, out, length: int) -> None:
+    """Copy `length` bytes from the current position of `inp` to `out`."""
+    while length > 0:
+        block = inp.read(min(READ_SIZE, length))
+        if not block:
+            raise EOFError("Unexpected end of MP3 data")
+        out.write(block)
+        length -= len(block)
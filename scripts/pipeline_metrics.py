@@ -0,0 +1,224 @@
+"""
+Lightweight stage timers and counters for the voiceover scripts, with a JSON
+report and an optional cProfile hook.
+
+Nothing is recorded until enable() is called, so instrumented code costs a
+flag check in normal runs. Timings and counters are also grouped by the
+current section, held in a context variable: asyncio tasks inherit it, so
+concurrent sections and chunks are attributed correctly without passing ids
+around.
+
+Counter names ending in a unit after a stage name (e.g. "tts.request.bytes"
+for the "tts.request" stage) also get a throughput rate in the report,
+computed over the time spent in that stage.
+"""
+
+import bisect
+import cProfile
+import contextlib
+import functools
+import json
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+# Upper bounds of the latency histogram buckets, in ms (plus an overflow bucket)
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 30000, 60000)
+
+_current_section: ContextVar[str | None] = ContextVar("metrics_section", default=None)
+_enabled = False
+_started = time.perf_counter()
+_samples: dict[str, list[float]] = defaultdict(list)  # stage -> seconds per call
+_counters: dict[str, float] = defaultdict(float)
+_sections: dict[str, dict[str, dict[str, float]]] = {}  # section -> {"timeMs"|"counters": ...}
+_events: list[dict] = []
+
+
+def enable(reset: bool = False) -> None:
+    """Start recording (optionally discarding anything recorded so far)."""
+    global _enabled, _started
+    _enabled = True
+    if reset:
+        _samples.clear()
+        _counters.clear()
+        _sections.clear()
+        _events.clear()
+        _started = time.perf_counter()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _section_entry(section: str) -> dict[str, dict[str, float]]:
+    if section not in _sections:
+        _sections[section] = {"timeMs": defaultdict(float), "counters": defaultdict(float)}
+    return _sections[section]
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record one timed call of `stage`."""
+    if not _enabled:
+        return
+    _samples[stage].append(seconds)
+    section = _current_section.get()
+    if section is not None:
+        _section_entry(section)["timeMs"][stage] += seconds * 1000
+
+
+def count(name: str, value: float = 1) -> None:
+    if not _enabled:
+        return
+    _counters[name] += value
+    section = _current_section.get()
+    if section is not None:
+        _section_entry(section)["counters"][name] += value
+
+
+def event(kind: str, **fields) -> None:
+    """Record a per-item row (e.g. one per chunk) for the report."""
+    if _enabled:
+        _events.append({"kind": kind, "section": _current_section.get(), **fields})
+
+
+@contextlib.contextmanager
+def timer(stage: str):
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Decorator form of timer() for plain functions."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextlib.contextmanager
+def section(section_id: str):
+    """Attribute everything recorded inside the block to `section_id`."""
+    token = _current_section.set(section_id)
+    try:
+        yield
+    finally:
+        _current_section.reset(token)
+
+
+def snapshot() -> dict:
+    """Picklable copy of everything recorded, for merging across processes."""
+    return {
+        "samples": {k: list(v) for k, v in _samples.items()},
+        "counters": dict(_counters),
+        "sections": {
+            s: {kind: dict(values) for kind, values in entry.items()}
+            for s, entry in _sections.items()
+        },
+        "events": list(_events),
+    }
+
+
+def merge(data: dict) -> None:
+    """Fold a snapshot() from a worker process into this process's metrics."""
+    if not _enabled:
+        return
+    for stage, values in data["samples"].items():
+        _samples[stage].extend(values)
+    for name, value in data["counters"].items():
+        _counters[name] += value
+    for s, entry in data["sections"].items():
+        target = _section_entry(s)
+        for kind, values in entry.items():
+            for name, value in values.items():
+                target[kind][name] += value
+    _events.extend(data["events"])
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _stage_summary(seconds: list[float]) -> dict:
+    ms = sorted(s * 1000 for s in seconds)
+    buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for value in ms:
+        buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value)] += 1
+    labels = [f"<={b:g}ms" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]:g}ms"]
+    return {
+        "count": len(ms),
+        "totalMs": round(sum(ms), 3),
+        "meanMs": round(sum(ms) / len(ms), 3),
+        "p50Ms": round(_percentile(ms, 50), 3),
+        "p90Ms": round(_percentile(ms, 90), 3),
+        "p99Ms": round(_percentile(ms, 99), 3),
+        "maxMs": round(ms[-1], 3),
+        "histogram": {label: n for label, n in zip(labels, buckets) if n},
+    }
+
+
+def _number(value: float) -> float | int:
+    return int(value) if float(value).is_integer() else round(value, 3)
+
+
+def report() -> dict:
+    stages = {stage: _stage_summary(values) for stage, values in sorted(_samples.items()) if values}
+    rates = {}
+    for name, value in sorted(_counters.items()):
+        stage = name.rpartition(".")[0]
+        if stage in stages and stages[stage]["totalMs"] > 0:
+            rates[f"{name}PerSec"] = round(value / (stages[stage]["totalMs"] / 1000), 3)
+    return {
+        "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "wallMs": round((time.perf_counter() - _started) * 1000, 3),
+        "stages": stages,
+        "counters": {k: _number(v) for k, v in sorted(_counters.items())},
+        "rates": rates,
+        "sections": {
+            s: {
+                "timeMs": {k: round(v, 3) for k, v in sorted(entry["timeMs"].items())},
+                "counters": {k: _number(v) for k, v in sorted(entry["counters"].items())},
+            }
+            for s, entry in sorted(_sections.items())
+        },
+        "events": _events,
+    }
+
+
+def write_report(path: Path) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
+    print(f"Metrics report: {path}")
+
+
+@contextlib.contextmanager
+def profiled(path: Path | None):
+    """Run the block under cProfile and dump stats to `path` (no-op if None).
+    Only the current process is profiled; inspect with `python -m pstats`."""
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"cProfile stats: {path}")
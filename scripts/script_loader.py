@@ -0,0 +1,29 @@
+"""
+Import the hyphenated scripts in this directory (extract-text.py,
+generate-audio.py) as modules, for the tools built on top of them. Their
+file names are not valid module names, so a plain import cannot find them.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+
+
+def load_script(file_name: str):
+    """Import scripts/`file_name` once per process, registered in
+    sys.modules under its underscored name (generate-audio.py becomes
+    generate_audio), and return the module."""
+    module_name = file_name.removesuffix(".py").replace("-", "_")
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
@@ -0,0 +1,11 @@
+"""
+Tests for the voiceover pipeline scripts. Run from the repository root with
+`python3 -m pytest scripts/tests`.
+"""
+
+import sys
+from pathlib import Path
+
+# The scripts import their helper modules (mp3frames, script_loader, ...) by
+# plain name, as they do when run from scripts/
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,52 @@
+"""extract-text.py: frozen clean_text outputs, and the single-pass scanner
+against the regex reference extractors on generated tag soup."""
+
+import random
+
+import pytest
+
+from script_loader import load_script
+
+et = load_script("extract-text.py")
+
+# Frozen clean_text outputs, so entity decoding order and stage skipping
+# cannot drift without a deliberate edit here
+CLEAN_TEXT_GOLDEN = (
+    ("Plain text stays.", "Plain text stays."),
+    ("Tom &amp; Jerry &quot;hi&quot; &apos;yo&apos;", "Tom & Jerry \"hi\" 'yo'"),
+    ("Wait&mdash;what&hellip; &nbsp;ok", "Wait — what... ok"),
+    ("&#39;quoted&#39; &#x41;BC &#38;", "'quoted' ABC &"),
+    ("&ldquo;smart&rdquo; &times; &rarr; &ndash;", "&ldquo;smart&rdquo; × → –"),
+    ("&unknown; &amp;amp; &amp;lt;", "&unknown; &amp; <"),
+    ("line<br/>break<br >again", "line break again"),
+    ('a <Foo x="1" /> b', "a b"),
+    ("<b>bold</b> and <code>code</code>", "bold and code"),
+    ('{/* comment */}kept{" "}spaced{"x"}', "kept spacedx"),
+    ("{'single'} {value} gone", "single gone"),
+    ("a {b} c {/* multi\nline */} d", "a c d"),
+    ("  lots   of\n\t whitespace  ", "lots of whitespace"),
+)
+
+# Fragments strung together into tag soup: every narrated element,
+# attributes containing ">", stray brackets and unclosed tags
+SCANNER_FUZZ_TOKENS = (
+    '<h3>', '</h3>', '<h3 className="x">', '<h3', '<p className="text-text-secondary">', '<p>', '</p>',
+    "<p className='leading-relaxed'", '<InfoCard title="Tt">', '</InfoCard>', '<InfoCard title="z" />',
+    '<AnalogyCard concept="Cc" analogy="Aa" />', '<TermDefinition term="T" definition="D"/>',
+    '<TermDefinition term="a>b" definition="c"/>', '<RevealCard prompt="Pp" answer="Ans"/>',
+    '<RevealCard prompt="Q" options={["a","b"]}>', '</RevealCard>', '<br/>', '{x}', '>', '<', '/',
+    'hello world text here ', 'more words in it ',
+)
+
+
+@pytest.mark.parametrize(("text", "expected"), CLEAN_TEXT_GOLDEN)
+def test_clean_text_golden(text, expected):
+    assert et.clean_text(text) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_scanner_matches_regex_extractors(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        content = "".join(rng.choice(SCANNER_FUZZ_TOKENS) for _ in range(rng.randint(1, 25)))
+        assert et.extract_blocks_scan(content) == et.extract_blocks_regex(content), content
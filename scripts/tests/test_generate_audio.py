@@ -0,0 +1,56 @@
+"""generate-audio.py: TTS responses streamed through AudioFieldStreamer."""
+
+import base64
+import io
+import json
+import random
+
+import pytest
+
+from script_loader import load_script
+
+ga = load_script("generate-audio.py")
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_audio_field_streamer_round_trip(seed):
+    """JSON documents in either layout, with "/" optionally escaped as "\\/",
+    base64 padding optionally stripped, snippet and second-generation "audio"
+    fields before or after the generation's own, decoys named "audio"
+    elsewhere, and arbitrary feed sizes give back exactly generations[0]'s
+    audio and the rest of the document with every "audio" set to ""."""
+    rng = random.Random(seed)
+    for case in range(100):
+        audio = rng.randbytes(rng.randint(0, 5000))
+        encoded = base64.b64encode(audio).decode()
+        if rng.random() < 0.25:
+            encoded = encoded.rstrip("=")
+        snippets = [[{
+            "text": 'say "audio": "x" \\ ok',
+            "audio": base64.b64encode(rng.randbytes(rng.randint(0, 500))).decode(),
+            "timestamps": [{"text": "audio", "time": {"begin": 1, "end": 2}}],
+        } for _ in range(rng.randint(0, 3))]]
+        fields = [("snippets", snippets), ("audio", encoded), ("duration", 1.5)]
+        rng.shuffle(fields)
+        generations = [dict(fields)]
+        if rng.random() < 0.25:
+            generations.append({"audio": base64.b64encode(rng.randbytes(100)).decode(), "duration": 0.5})
+        raw = json.dumps({"generations": generations, "request_id": "audio"}, indent=rng.choice((None, 1, 2)))
+        if rng.random() < 0.5:
+            raw = raw.replace("/", "\\/")
+        raw = raw.encode()
+
+        out = io.BytesIO()
+        streamer = ga.AudioFieldStreamer(out)
+        i = 0
+        while i < len(raw):
+            n = rng.randint(1, 700)
+            streamer.feed(raw[i:i + n])
+            i += n
+        label = f"seed {seed} case {case}"
+        assert out.getvalue() == audio, label
+        assert streamer.document()["generations"][0] == {
+            "snippets": [[dict(snippet, audio="") for snippet in group] for group in snippets],
+            "audio": "",
+            "duration": 1.5,
+        }, label
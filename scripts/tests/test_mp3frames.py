@@ -0,0 +1,91 @@
+"""mp3frames.py: random synthetic audio split into chunk files the way TTS
+responses arrive, merged back, and checked frame by frame."""
+
+import bisect
+import random
+
+import pytest
+
+import mp3frames
+
+
+def synth_frame(rng: random.Random, bitrate_index: int, padding: int, channel_mode: int) -> bytes:
+    """A 44.1kHz MPEG-1 Layer III frame with a random payload."""
+    raw = bytes((0xFF, 0xFB, (bitrate_index << 4) | (padding << 1), channel_mode << 6))
+    header = mp3frames.parse_header(raw)
+    # Zero side info, so the payload can never read as a Xing/Info tag
+    body = bytes(header.side_info_size) + rng.randbytes(header.length - 4 - header.side_info_size)
+    return raw + body
+
+
+def synth_chunk(rng: random.Random, channel_mode: int, cbr: bool) -> tuple[bytes, bytes]:
+    """One chunk file as a TTS response might look (optional ID3v2 tag,
+    Info frame, zero fill between frames and ID3v1 tag), and its audio frames."""
+    bitrate_index = rng.randint(1, 14)
+    frames = [
+        synth_frame(rng, bitrate_index if cbr else rng.randint(1, 14), rng.randint(0, 1), channel_mode)
+        for _ in range(rng.randint(1, 60))
+    ]
+    audio = b"".join(frames)
+    data = bytearray()
+    if rng.random() < 0.5:
+        tag = rng.randbytes(rng.randint(0, 300))
+        size = len(tag)
+        data += b"ID3\x04\x00\x00" + bytes(((size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F))
+        data += tag
+    if rng.random() < 0.5:
+        template = mp3frames.parse_header(frames[0])
+        data += mp3frames.build_info_frame(template, len(frames), len(audio), bytes(100), cbr)
+    for i, frame in enumerate(frames):
+        data += frame
+        # Not after the first frame: scan() only trusts a first frame followed by another
+        if i and rng.random() < 0.05:
+            data += bytes(rng.randint(1, 40))
+    if rng.random() < 0.5:
+        data += b"TAG" + bytes(125)
+    return bytes(data), audio
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_split_and_merge_round_trip(seed, tmp_path):
+    """Merged files keep the audio frames exactly and in order behind one
+    Xing/Info frame counting them, durations add up, and seek_offset() /
+    frame_end() bracket every probed sample."""
+    rng = random.Random(seed)
+    for case in range(50):
+        channel_mode = rng.choice((0, 1, mp3frames.MONO))
+        cbr = rng.random() < 0.5
+        chunk_files, audio = [], b""
+        for i in range(rng.randint(1, 6)):
+            data, chunk_audio = synth_chunk(rng, channel_mode, cbr)
+            path = tmp_path / f"chunk-{i}.mp3"
+            path.write_bytes(data)
+            chunk_files.append(path)
+            audio += chunk_audio
+        output = tmp_path / "merged.mp3"
+        infos = mp3frames.merge(chunk_files, output)
+        merged = mp3frames.scan(output)
+        data = output.read_bytes()
+        head = mp3frames.parse_header(data)
+        label = f"seed {seed} case {case}"
+
+        assert merged.frames == sum(info.frames for info in infos), label
+        assert data[len(data) - len(audio):] == audio, label
+        assert merged.runs == [(len(data) - len(audio), len(audio))], label
+        assert head is not None and mp3frames.is_info_frame(data[:head.length], head), label
+        assert head.length + len(audio) == len(data), label
+        count_at = 4 + head.side_info_size + 8
+        assert int.from_bytes(data[count_at:count_at + 4], "big") == merged.frames, label
+        assert merged.duration_ms == pytest.approx(sum(info.duration_ms for info in infos)), label
+        assert (merged.frame_offsets, merged.frame_starts) == mp3frames.frame_table(
+            [info for info in infos if info.frames]
+        ), label
+
+        offsets, starts = merged.frame_offsets, merged.frame_starts
+        for _ in range(20):
+            sample = rng.randrange(merged.samples)
+            frame = offsets[bisect.bisect_right(starts, sample) - 1]
+            begin = mp3frames.seek_offset(offsets, starts, sample)
+            end = mp3frames.frame_end(offsets, starts, sample, merged.audio_bytes)
+            assert begin <= frame < end, f"{label}, sample {sample}"
+            assert begin == 0 or frame - begin >= mp3frames.BIT_RESERVOIR_BYTES, f"{label}, sample {sample}"
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Check generated voiceover audio and metadata for consistency, without
+calling the TTS API. Per section: the metadata parses, fileSizeBytes and
+totalDurationMs match the MP3 (duration from its frame headers), block and
+word timings are in order and inside the audio, byte ranges are current,
+and the narrated blocks match scripts/extracted/. The master manifest must
+list every section with matching entries and totals.
+
+Sections are checked in parallel worker processes. Exits 1 if anything is
+wrong, after printing a report for every failing section.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import metadata_codec
+import mp3frames
+from script_loader import load_script
+
+DURATION_TOLERANCE_MS = 100  # Metadata written before durations came from frames is ~40ms short
+TIMING_JITTER_MS = 2000  # TTS word timings overlap by up to ~1s; more means a misplaced chunk
+MAX_TEXT_PROBLEMS = 5  # Block text mismatches listed per section
+
+
+def check_timings(meta: dict, tolerance_ms: int) -> list[str]:
+    """Block and word timings must run forward and stay inside the audio."""
+    problems = []
+    total = meta["totalDurationMs"]
+    prev_index = prev_begin = -1
+    for block in meta["blocks"]:
+        label = f"block {block['blockIndex']}"
+        if block["blockIndex"] <= prev_index:
+            problems.append(f"{label}: blockIndex not after {prev_index}")
+        if block["beginMs"] < prev_begin:
+            problems.append(f"{label}: begins at {block['beginMs']}ms, before the previous block ({prev_begin}ms)")
+        if block["endMs"] < block["beginMs"]:
+            problems.append(f"{label}: ends at {block['endMs']}ms, before it begins ({block['beginMs']}ms)")
+        if block["endMs"] > total + tolerance_ms:
+            problems.append(f"{label}: ends at {block['endMs']}ms, after the audio ({total}ms)")
+        prev_index, prev_begin = block["blockIndex"], block["beginMs"]
+
+        timestamps = block["timestamps"]
+        if not timestamps:
+            continue
+        if (timestamps[0]["begin"], timestamps[-1]["end"]) != (block["beginMs"], block["endMs"]):
+            problems.append(f"{label}: beginMs/endMs do not match its first and last word")
+        last = block["beginMs"]
+        for ts in timestamps:
+            if ts["begin"] < last - TIMING_JITTER_MS or ts["end"] < ts["begin"] - TIMING_JITTER_MS:
+                problems.append(f"{label}: word {ts['word']!r} at {ts['begin']}ms runs backwards")
+                break
+            last = max(last, ts["begin"])
+    return problems
+
+
+def check_byte_ranges(ga, meta: dict, info: mp3frames.Mp3Info) -> list[str]:
+    """Recompute beginByte/endByte from the frames, as index-audio.py would."""
+    if not any("beginByte" in b for b in meta["blocks"]):
+        return []
+    if len(info.runs) != 1:
+        return [f"has byte ranges but audio frames are not contiguous ({len(info.runs)} runs)"]
+    expected = [{"beginMs": b["beginMs"], "endMs": b["endMs"], "timestamps": b["timestamps"]} for b in meta["blocks"]]
+    ga.add_byte_ranges(
+        expected, info.frame_offsets, info.frame_starts, info.sample_rate,
+        info.runs[0][0], info.audio_bytes,
+    )
+    stale = [
+        str(b["blockIndex"]) for b, e in zip(meta["blocks"], expected)
+        if (b.get("beginByte"), b.get("endByte")) != (e.get("beginByte"), e.get("endByte"))
+    ]
+    if stale:
+        return [f"byte ranges stale for block(s) {', '.join(stale)} (run index-audio.py)"]
+    return []
+
+
+def check_text(ga, sec_id: str, meta: dict) -> list[str]:
+    """The metadata must narrate exactly the extracted blocks, in order."""
+    extracted_path = ga.EXTRACTED_DIR / f"{sec_id}.json"
+    if not extracted_path.exists():
+        return ["no extracted text to compare against (run extract-text.py)"]
+    with open(extracted_path, encoding="utf-8") as f:
+        extracted = {b["blockIndex"]: b for b in ga.narration_blocks(json.load(f).get("blocks", []))}
+    narrated = {b["blockIndex"]: b for b in meta["blocks"]}
+
+    problems = []
+    for index in sorted(extracted.keys() | narrated.keys()):
+        if index not in narrated:
+            problems.append(f"block {index}: extracted but not narrated")
+        elif index not in extracted:
+            problems.append(f"block {index}: narrated but no longer extracted")
+        elif narrated[index]["text"] != extracted[index]["text"]:
+            problems.append(f"block {index}: text differs from extraction")
+        elif narrated[index]["type"] != extracted[index]["type"]:
+            problems.append(f"block {index}: type {narrated[index]['type']!r}, extracted as {extracted[index]['type']!r}")
+    if len(problems) > MAX_TEXT_PROBLEMS:
+        problems[MAX_TEXT_PROBLEMS:] = [f"... and {len(problems) - MAX_TEXT_PROBLEMS} more block text problem(s)"]
+    return problems
+
+
+def verify_section(item: tuple[str, int]) -> dict:
+    """Check one section; returns its problems and the values the manifest
+    should record for it (None if the metadata is unreadable)."""
+    sec_id, tolerance_ms = item
+    ga = load_script("generate-audio.py")  # Once per worker process
+    report = {"sectionId": sec_id, "problems": [], "entry": None}
+    problems = report["problems"]
+
+    meta_path = ga.METADATA_OUTPUT_DIR / f"{sec_id}.json"
+    if not meta_path.exists():
+        problems.append("no metadata (not generated)")
+        return report
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            doc = json.load(f)
+        if metadata_codec.is_compact(doc):
+            problems.extend(metadata_codec.check(doc))
+            if problems:
+                return report
+        meta = metadata_codec.decode(doc)
+        report["entry"] = {
+            "audioFile": meta["audioFile"],
+            "totalDurationMs": meta["totalDurationMs"],
+            "fileSizeBytes": meta["fileSizeBytes"],
+            "blockCount": len(meta["blocks"]),
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        problems.append(f"unreadable metadata: {type(e).__name__}: {e}")
+        return report
+
+    if meta.get("sectionId") != sec_id:
+        problems.append(f"sectionId is {meta.get('sectionId')!r}")
+    problems.extend(check_timings(meta, tolerance_ms))
+    problems.extend(check_text(ga, sec_id, meta))
+
+    audio_path = ga.PROJECT_ROOT / "public" / meta["audioFile"].lstrip("/")
+    if not audio_path.exists():
+        problems.append(f"no audio file {meta['audioFile']}")
+        return report
+    size = audio_path.stat().st_size
+    if size != meta["fileSizeBytes"]:
+        problems.append(f"fileSizeBytes is {meta['fileSizeBytes']:,}, file has {size:,}")
+    info = mp3frames.scan(audio_path)
+    if not info.frames:
+        problems.append("no MPEG audio frames")
+        return report
+    duration_ms = round(info.duration_ms)
+    if abs(duration_ms - meta["totalDurationMs"]) > tolerance_ms:
+        problems.append(f"totalDurationMs is {meta['totalDurationMs']}, audio is {duration_ms}ms")
+    problems.extend(check_byte_ranges(ga, meta, info))
+    return report
+
+
+def check_manifest(ga, section_ids: list[str], reports: list[dict], partial: bool) -> list[str]:
+    """The master manifest must agree with each section's metadata. Unless
+    only some sections were checked, it must list exactly those sections
+    and its totals must add up."""
+    manifest_path = ga.METADATA_OUTPUT_DIR / "manifest.json"
+    if not manifest_path.exists():
+        return ["no manifest.json"]
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    entries = {e["sectionId"]: e for e in manifest["sections"]}
+
+    problems = []
+    for report in reports:
+        sec_id, expected = report["sectionId"], report["entry"]
+        entry = entries.get(sec_id)
+        if entry is None:
+            if expected is not None:
+                problems.append(f"{sec_id}: generated but not in the manifest")
+            continue
+        if expected is None:
+            problems.append(f"{sec_id}: listed but has no readable metadata")
+            continue
+        for key, value in expected.items():
+            if entry.get(key) != value:
+                problems.append(f"{sec_id}: {key} is {entry.get(key)!r}, metadata has {value!r}")
+
+    if not partial:
+        for sec_id in entries.keys() - set(section_ids):
+            problems.append(f"{sec_id}: listed but not a section in {ga.MANIFEST_PATH.name}")
+        for key, total_key in (("totalDurationMs", "totalDurationMs"), ("fileSizeBytes", "totalSizeBytes")):
+            total = sum(e[key] for e in manifest["sections"])
+            if manifest.get(total_key) != total:
+                problems.append(f"{total_key} is {manifest.get(total_key)!r}, sections add up to {total}")
+    return problems
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sections", nargs="*", help="only these section ids (default: all in the manifest)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--tolerance-ms", type=int, default=DURATION_TOLERANCE_MS,
+                        help=f"allowed totalDurationMs error (default: {DURATION_TOLERANCE_MS})")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    ga = load_script("generate-audio.py")
+    with open(ga.MANIFEST_PATH) as f:
+        section_ids = [section["id"] for section in json.load(f)["sections"]]
+    selected = args.sections or section_ids
+
+    work = [(sec_id, args.tolerance_ms) for sec_id in selected]
+    if args.jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(work))) as pool:
+            reports = list(pool.map(verify_section, work))
+    else:
+        reports = [verify_section(item) for item in work]
+
+    failed = 0
+    for report in reports:
+        if report["problems"]:
+            failed += 1
+            print(f"FAIL {report['sectionId']}")
+            for problem in report["problems"]:
+                print(f"  - {problem}")
+
+    manifest_problems = check_manifest(ga, section_ids, reports, partial=bool(args.sections))
+    if manifest_problems:
+        print("FAIL manifest.json")
+        for problem in manifest_problems:
+            print(f"  - {problem}")
+
+    print(f"\n{len(reports) - failed} of {len(reports)} section(s) OK"
+          + (", manifest OK" if not manifest_problems else ", manifest FAILED"))
+    if failed or manifest_problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Columnar store for a section's word timestamps.
+
+A section can have tens of thousands of words; as {word, begin, end} dicts
+each costs a few hundred bytes. WordTimestamps keeps them as three parallel
+array("i") columns (word id, begin, end) plus a vocabulary of distinct
+words, and hands out TimestampSpan views of a range without copying.
+
+A span behaves like a read-only list of {word, begin, end} dicts (built on
+access), so code written for the plain JSON shape keeps working, and
+json.dumps(..., default=list) serializes it in that shape.
+"""
+
+from array import array
+from collections.abc import Sequence
+
+
+class WordTimestamps:
+    """Append-only word timestamps for one section, in playback order."""
+
+    __slots__ = ("vocabulary", "_word_index", "word_ids", "begins", "ends")
+
+    def __init__(self):
+        self.vocabulary: list[str] = []
+        self._word_index: dict[str, int] = {}
+        self.word_ids = array("i")
+        self.begins = array("i")
+        self.ends = array("i")
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def append(self, word: str, begin: int, end: int) -> None:
+        word_id = self._word_index.get(word)
+        if word_id is None:
+            word_id = self._word_index[word] = len(self.vocabulary)
+            self.vocabulary.append(word)
+        self.word_ids.append(word_id)
+        self.begins.append(begin)
+        self.ends.append(end)
+
+    def extend(self, timestamps: list[dict], shift: int = 0) -> None:
+        """Append API-shaped timestamps, moved `shift` ms later."""
+        for ts in timestamps:
+            self.append(ts["word"], ts["begin"] + shift, ts["end"] + shift)
+
+    def word(self, i: int) -> str:
+        return self.vocabulary[self.word_ids[i]]
+
+    def span(self, lo: int, hi: int) -> "TimestampSpan":
+        return TimestampSpan(self, lo, hi)
+
+
+class TimestampSpan(Sequence):
+    """Read-only view of positions [lo, hi) of a WordTimestamps."""
+
+    __slots__ = ("store", "lo", "hi")
+
+    def __init__(self, store: WordTimestamps, lo: int, hi: int):
+        self.store = store
+        self.lo = lo
+        self.hi = hi
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(lo, hi, step)]
+            return TimestampSpan(self.store, self.lo + lo, self.lo + max(lo, hi))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("timestamp index out of range")
+        i = self.lo + index
+        store = self.store
+        return {"word": store.word(i), "begin": store.begins[i], "end": store.ends[i]}
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other) if isinstance(other, (list, TimestampSpan)) else NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TimestampSpan({self.lo}, {self.hi})"
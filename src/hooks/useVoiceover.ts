@@ -3,7 +3,12 @@
 import { useCallback, useEffect, useRef } from "react";
 import { useVoiceoverStore } from "@/store/voiceoverStore";
 import { useActiveSection, SECTION_IDS } from "@/hooks/useActiveSection";
-import type { SectionMetadata, TextBlock } from "@/types/voiceover";
+import type {
+  CompactSectionMetadata,
+  SectionMetadata,
+  TextBlock,
+  WordTimestamp,
+} from "@/types/voiceover";
 
 function findActiveBlock(blocks: TextBlock[], timeMs: number): number {
   if (blocks.length === 0) return -1;
@@ -30,6 +35,27 @@ function getState() {
 const BASE_PATH = process.env.NEXT_PUBLIC_BASE_PATH || "";
 const metadataCache: Record<string, SectionMetadata> = {};
 
+function decodeMetadata(data: SectionMetadata | CompactSectionMetadata): SectionMetadata {
+  if (!("format" in data)) return data;
+  const { words } = data;
+  return {
+    sectionId: data.sectionId,
+    audioFile: data.audioFile,
+    totalDurationMs: data.totalDurationMs,
+    fileSizeBytes: data.fileSizeBytes,
+    blocks: data.blocks.map(({ w, g, d, ...block }) => {
+      const timestamps: WordTimestamp[] = new Array(w.length);
+      let prev = block.beginMs;
+      for (let i = 0; i < w.length; i++) {
+        const begin = prev + g[i];
+        prev = begin + d[i];
+        timestamps[i] = { word: words[w[i]], begin, end: prev };
+      }
+      return { ...block, timestamps };
+    }),
+  };
+}
+
 async function fetchMetadata(sectionId: string): Promise<SectionMetadata | null> {
   if (metadataCache[sectionId]) return metadataCache[sectionId];
   const existing = getState().getMetadata(sectionId);
@@ -40,7 +66,7 @@ async function fetchMetadata(sectionId: string): Promise<SectionMetadata | null>
   try {
     const res = await fetch(`${BASE_PATH}/audio/metadata/${sectionId}.json`);
     if (!res.ok) return null;
-    const meta: SectionMetadata = await res.json();
+    const meta = decodeMetadata(await res.json());
     metadataCache[sectionId] = meta;
     getState().loadMetadata(sectionId, meta);
     return meta;
@@ -62,7 +88,7 @@ function getAudio(): HTMLAudioElement {
 
 /**
  * Core play function — used by everything.
- * Loads metadata, sets source, plays, and seeks to the given time.
+ * Loads metadata, sets source, seeks to the given time, and plays.
  */
 async function startPlayback(sectionId: string, seekMs: number, blockIndex: number) {
   const meta = await fetchMetadata(sectionId);
@@ -71,10 +97,13 @@ async function startPlayback(sectionId: string, seekMs: number, blockIndex: numb
   const audio = getAudio();
   const s = getState();
 
-  // Always set source (ensures correct file)
+  // Always set source (ensures correct file). A media fragment makes the
+  // first range request start at the seek target (the file has a Xing seek
+  // table) instead of buffering from byte 0.
   const currentSrc = audio.src || "";
   if (!currentSrc.includes(sectionId)) {
-    audio.src = `${BASE_PATH}${meta.audioFile}`;
+    const fragment = seekMs > 0 ? `#t=${(seekMs / 1000).toFixed(3)}` : "";
+    audio.src = `${BASE_PATH}${meta.audioFile}${fragment}`;
   }
   audio.playbackRate = s.playbackRate;
 
@@ -84,12 +113,14 @@ async function startPlayback(sectionId: string, seekMs: number, blockIndex: numb
   s.setPlaying(true);
 
   try {
-    const p = audio.play();
-    if (p) await p;
-    // Seek after play starts (avoids seeking before load)
+    // Seek before playing, so the element never fetches and plays the
+    // start of the file first. Before metadata has loaded this only sets
+    // the default start position, which the element applies once it can.
     if (seekMs > 0) {
       audio.currentTime = seekMs / 1000;
     }
+    const p = audio.play();
+    if (p) await p;
   } catch (err) {
     console.error("[voiceover] Play failed:", err);
     getState().setPlaying(false);
@@ -13,7 +13,17 @@ export interface TextBlock {
   beginMs: number;
   endMs: number;
   timestamps: WordTimestamp[];
+  alignmentConfidence?: number; // share of words matched exactly (0–1)
   requiresReveal?: boolean;
+  /**
+   * Byte range of the block's audio in the section MP3, on frame boundaries
+   * (`Range: bytes=beginByte-(endByte - 1)`). Written by index-audio.py and
+   * checked by verify-audio.py; the player seeks by time (`#t=` fragment plus
+   * a seek before play()) and leaves range requests to the audio element.
+   * Absent in older metadata.
+   */
+  beginByte?: number;
+  endByte?: number;
 }
 
 /** Metadata for a single section's audio */
@@ -25,6 +35,24 @@ export interface SectionMetadata {
   blocks: TextBlock[];
 }
 
+/**
+ * Compact on-disk form of SectionMetadata (generate-audio.py --compact-metadata).
+ * Each block's timestamps are stored as parallel columns: `w` indexes into
+ * `words`, `g` is the gap since the previous word's end (or beginMs), `d` the
+ * word's duration.
+ */
+export interface CompactTextBlock extends Omit<TextBlock, "timestamps"> {
+  w: number[];
+  g: number[];
+  d: number[];
+}
+
+export interface CompactSectionMetadata extends Omit<SectionMetadata, "blocks"> {
+  format: "compact-v1";
+  words: string[];
+  blocks: CompactTextBlock[];
+}
+
 /** Entry in the master manifest */
 export interface ManifestEntry {
   sectionId: string;